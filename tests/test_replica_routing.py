@@ -0,0 +1,169 @@
+import sqlite3
+import time
+
+import pytest
+from flask import g, session
+
+import website
+from website import db
+from website.cache import reference_cache
+from website.config import Config
+from website.db.sqlite import SQLite, SQLiteConnection, _concat
+from website.models.collegedb import College
+
+# A stub primary/replica pair: two SQLite files, the second a copy of the
+# first taken at startup and never written to again, so it behaves like a
+# replica that has not caught up with anything since.
+
+
+class ReplicatedSQLite(SQLite):
+    has_replicas = True
+
+    def __init__(self, app=None):
+        self.replica_path = None
+        self.replica_reads = 0
+        super().__init__(app)
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.replica_path = app.config['SQLITE_REPLICA_PATH']
+        app.teardown_appcontext(self._teardown_replica)
+
+    def clone_replica(self):
+        primary = self._connect()
+        replica = sqlite3.connect(self.replica_path)
+        primary.backup(replica)
+        replica.close()
+        primary.close()
+        with self._lock:
+            self.open -= 1
+
+    @property
+    def read_connection(self):
+        conn = g.get('_replica_conn')
+        if conn is None:
+            raw = sqlite3.connect(self.replica_path, check_same_thread=False)
+            raw.create_function('CONCAT', -1, _concat, deterministic=True)
+            conn = g._replica_conn = SQLiteConnection(raw, self.dialect)
+            self.replica_reads += 1
+        return conn
+
+    def _teardown_replica(self, _):
+        conn = g.pop('_replica_conn', None)
+        if conn is not None:
+            conn.close()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setitem(db.BACKENDS, 'sqlite-replicated', ReplicatedSQLite)
+    monkeypatch.setattr(Config, 'DB_BACKEND', 'sqlite-replicated')
+    monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'primary.sqlite3'))
+    monkeypatch.setattr(Config, 'SQLITE_REPLICA_PATH', str(tmp_path / 'replica.sqlite3'), raising=False)
+    monkeypatch.setattr(Config, 'SECRET_KEY', 'test')
+    monkeypatch.setattr(Config, 'MIGRATE_ON_STARTUP', True)
+    monkeypatch.setattr(Config, 'RESPONSE_CACHE_BACKEND', 'memory')
+    app = website.create_app()
+    app.config['TESTING'] = True
+    website.mysql.backend.clone_replica()
+    return app
+
+
+def replica_reads(app):
+    return website.mysql.backend.replica_reads
+
+
+def add_college(client, name, code):
+    return client.post('/college/add', data={'college_name': name, 'college_code': code})
+
+
+def test_get_reads_from_replica(app):
+    with app.app_context():
+        # No request: a write like this one always goes to the primary
+        College(college_name='Lagging College', college_code='LAG').insert()
+
+    before = replica_reads(app)
+    response = app.test_client().get('/college/')
+    assert response.status_code == 200
+    assert replica_reads(app) > before
+    assert b'Lagging College' not in response.data
+
+    with app.test_request_context('/college/'):
+        assert website.mysql.read_connection is not website.mysql.connection
+
+
+def test_post_pins_the_writer_to_primary(app):
+    writer, other = app.test_client(), app.test_client()
+    # Fill the page cache and the reference cache from the replica first
+    assert b'Pinned College' not in writer.get('/college/').data
+    assert b'Pinned College' not in writer.get('/course/add').data
+
+    response = add_college(writer, 'Pinned College', 'PIN')
+    assert response.status_code == 302
+    with writer.session_transaction() as sess:
+        assert sess[db.PRIMARY_UNTIL] > time.time()
+
+    before = replica_reads(app)
+    # Served from the primary: neither cache may answer with what it read from the replica
+    assert b'Pinned College' in writer.get(response.location).data
+    # Again with the flash message gone, which on its own keeps a page out of the cache
+    assert b'Pinned College' in writer.get('/college/').data
+    assert b'Pinned College' in writer.get('/course/add').data
+    assert replica_reads(app) == before
+
+    # Nobody else is pinned
+    assert b'Pinned College' not in other.get('/college/').data
+    assert replica_reads(app) > before
+
+
+def test_pinned_reads_skip_the_reference_cache(app):
+    calls = []
+
+    def loader():
+        calls.append(website.mysql.pinned_to_primary())
+        return ['fresh']
+
+    with app.test_request_context('/college/'):
+        reference_cache.get('test.loader', ('college',), loader)
+        reference_cache.get('test.loader', ('college',), loader)
+    assert calls == [False]
+
+    with app.test_request_context('/college/'):
+        session[db.PRIMARY_UNTIL] = time.time() + 60
+        assert reference_cache.get('test.loader', ('college',), loader) == ['fresh']
+        assert reference_cache.get('test.loader', ('college',), loader) == ['fresh']
+    assert calls == [False, True, True]
+
+
+def test_pin_expires(app):
+    client = app.test_client()
+    add_college(client, 'Expired College', 'EXP')
+    with client.session_transaction() as sess:
+        sess[db.PRIMARY_UNTIL] = time.time() - 1
+
+    before = replica_reads(app)
+    assert b'Expired College' not in client.get('/college/').data
+    assert replica_reads(app) > before
+
+
+def test_versions_come_from_the_request_read_connection(app):
+    with app.app_context():
+        College(college_name='Versioned College', college_code='VER').insert()
+        primary = reference_cache.versions('college')
+
+    with app.test_request_context('/college/'):
+        behind = reference_cache.versions('college')
+        assert behind < primary
+        # Read on the replica that serves the page, and kept for the rest of the request
+        g._table_versions['college'] = behind[0] + 100
+        assert reference_cache.versions('college') == (behind[0] + 100,)
+
+    with app.test_request_context('/college/'):
+        session[db.PRIMARY_UNTIL] = time.time() + 60
+        assert reference_cache.versions('college') == primary
+
+    # Not kept for the process: the next request sees the replica catch up
+    client = app.test_client()
+    assert b'Versioned College' not in client.get('/college/').data
+    website.mysql.backend.clone_replica()
+    assert b'Versioned College' in client.get('/college/').data
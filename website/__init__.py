@@ -1,6 +1,11 @@
 from flask import Flask
-from flask_mysql_connector import MySQL
-from .db import create_tables, mysql
+from .db import migrate_on_startup, mysql
+from .cache import reference_cache
+from .http_cache import response_cache
+from . import metrics
+from .uploads import photo_uploader
+from .suggest import suggest_index
+from .models.counters import reconciler
 from website.config import Config
 from dotenv import load_dotenv
 from cloudinary import config as cloudinary_config
@@ -11,14 +16,21 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)  # Set the maximum content length for file uploads
     mysql.init_app(app)
+    metrics.init_app(app)
+    reference_cache.init_app(app)
+    response_cache.init_app(app)
 
     cloudinary_config(
         cloud_name=app.config['CLOUDY_NAME'],
         api_key=app.config['CLOUDY_KEY'],
         api_secret=app.config['CLOUDY_SECRET']
     )
+    photo_uploader.init_app(app)
 
-    create_tables(app=app, mysql=mysql)
+    if app.config['MIGRATE_ON_STARTUP']:
+        migrate_on_startup(app, mysql)
+    reconciler.init_app(app)
+    suggest_index.init_app(app)
 
     from .routes.home import home
     from .routes.student import student
@@ -30,4 +42,7 @@ def create_app():
     app.register_blueprint(course, url_prefix='/course')
     app.register_blueprint(college, url_prefix='/college')
 
+    from .commands import register_commands
+    register_commands(app)
+
     return app
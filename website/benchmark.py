@@ -0,0 +1,266 @@
+import datetime
+import http.client
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from website import mysql
+from website.datagen import FIRST_NAMES, LAST_NAMES
+from website.models import counters
+from website.models.collegedb import College
+from website.models.studentdb import Student
+
+BENCH_PREFIX = '9999-'  # student IDs created by the write scenarios
+PER_PAGE = 10
+
+
+# ---------- DRIVERS ----------
+class ClientDriver:
+    """In-process through the Flask test client: measures app + DB, no network."""
+    name = 'client'
+
+    def __init__(self, app):
+        self.client = app.test_client(use_cookies=False)
+
+    def request(self, method, path, data=None):
+        return self.client.open(path, method=method, data=data).status_code
+
+
+class HttpDriver:
+    """Against a running server, one keep-alive connection per thread."""
+    name = 'http'
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == 'https'
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, data=None):
+        body = urlencode(data) if data is not None else None
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'} if body else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the keep-alive connection; retry once on a new one
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+
+# ---------- SCENARIOS ----------
+class Scenario:
+    def __init__(self, name, method, make, expect, prepare=None):
+        self.name = name
+        self.method = method
+        self.make = make        # i -> (path, form data or None)
+        self.expect = expect    # status code counted as success
+        self.prepare = prepare  # run in the app context right before the scenario
+
+
+class Fixture:
+    """What the scenarios need to know about the seeded data."""
+
+    def __init__(self):
+        self.students = counters.get('student')
+        self.courses = Student.get_courses()
+        self.colleges = College.get_colleges()
+        self.created = {}
+
+    def last_page(self, total):
+        return max(1, (total + PER_PAGE - 1) // PER_PAGE)
+
+    def created_ids(self, table, column, prefix):
+        cur = mysql.connection.cursor()
+        cur.execute(f"SELECT id FROM {table} WHERE {column} LIKE %s ORDER BY id", (prefix + '%',))
+        self.created[table] = [row[0] for row in cur.fetchall()]
+        cur.close()
+
+    def pick(self, table, i):
+        ids = self.created.get(table) or [0]
+        return ids[i % len(ids)]
+
+
+def build_scenarios(fixture, writes=True):
+    f = fixture
+    course_codes = [c['course_code'] for c in f.courses] or ['BSCS']
+    college_codes = [c['college_code'] for c in f.colleges] or ['CCS']
+    course_ids = [c['id'] for c in f.courses] or [0]
+    college_ids = [c['id'] for c in f.colleges] or [0]
+    deep_students = f.last_page(f.students)
+    deep_courses = f.last_page(len(f.courses))
+    deep_colleges = f.last_page(len(f.colleges))
+
+    def get(path):
+        return lambda i: (path, None)
+
+    scenarios = [
+        Scenario('student-list', 'GET', get('/student/'), 200),
+        Scenario('student-list-deep', 'GET', get(f'/student/?page={deep_students}'), 200),
+        Scenario('student-list-mid', 'GET', get(f'/student/?page={max(1, deep_students // 2)}'), 200),
+        Scenario('student-list-faceted', 'GET',
+                 lambda i: ('/student/?' + urlencode({'course': course_ids[i % len(course_ids)], 'year': i % 4 + 1}),
+                            None), 200),
+        Scenario('student-list-sorted', 'GET', get(f'/student/?sort=name&page={max(1, deep_students // 2)}'), 200),
+        Scenario('student-search-name', 'GET',
+                 lambda i: ('/student/search?' + urlencode({'query': LAST_NAMES[i % len(LAST_NAMES)]}), None), 200),
+        Scenario('student-search-scoped', 'GET',
+                 lambda i: ('/student/search?' + urlencode({
+                     'query': f'{FIRST_NAMES[i % len(FIRST_NAMES)]} year:{i % 4 + 1} '
+                              f'course:{course_codes[i % len(course_codes)]}'}), None), 200),
+        Scenario('student-search-deep', 'GET',
+                 lambda i: ('/student/search?' + urlencode({'query': LAST_NAMES[0], 'page': 50}), None), 200),
+        Scenario('student-suggest', 'GET',
+                 lambda i: ('/student/suggest?' + urlencode({'q': LAST_NAMES[i % len(LAST_NAMES)][:i % 4 + 2]}), None), 200),
+        Scenario('course-list', 'GET', get('/course/'), 200),
+        Scenario('course-list-deep', 'GET', get(f'/course/?page={deep_courses}'), 200),
+        Scenario('course-search', 'GET',
+                 lambda i: ('/course/search?' + urlencode({'query': course_codes[i % len(course_codes)]}), None), 200),
+        Scenario('college-list', 'GET', get('/college/'), 200),
+        Scenario('college-list-deep', 'GET', get(f'/college/?page={deep_colleges}'), 200),
+        Scenario('college-search', 'GET',
+                 lambda i: ('/college/search?' + urlencode({'query': college_codes[i % len(college_codes)]}), None), 200),
+        Scenario('dashboard', 'GET', get('/dashboard'), 200),
+    ]
+    if not writes:
+        return scenarios
+
+    def student_form(i, suffix=''):
+        return {'student_id': f'{BENCH_PREFIX}{i:06d}', 'firstName': FIRST_NAMES[i % len(FIRST_NAMES)],
+                'lastName': LAST_NAMES[i % len(LAST_NAMES)] + suffix, 'gender': ('Male', 'Female')[i % 2],
+                'year': str(i % 4 + 1), 'course_college': str(course_ids[i % len(course_ids)])}
+
+    # Each add/edit/delete trio works on the rows its own add created, so a
+    # run leaves the seeded data as it found it
+    scenarios += [
+        Scenario('student-add', 'POST', lambda i: ('/student/add', student_form(i)), 302),
+        Scenario('student-edit', 'POST',
+                 lambda i: (f"/student/edit/{f.pick('student', i)}", student_form(i, ' Jr')), 302,
+                 prepare=lambda: f.created_ids('student', 'student_id', BENCH_PREFIX)),
+        Scenario('student-delete', 'POST', lambda i: (f"/student/delete/{f.pick('student', i)}", {}), 302),
+        Scenario('course-add', 'POST',
+                 lambda i: ('/course/add', {'course_name': f'Bench Course {i}', 'course_code': f'BENCH{i}',
+                                            'college': str(college_ids[i % len(college_ids)])}), 302),
+        Scenario('course-edit', 'POST',
+                 lambda i: (f"/course/edit/{f.pick('course', i)}",
+                            {'course_name': f'Bench Course {i} (edited)', 'course_code': f'BENCH{i}',
+                             'college': str(college_ids[i % len(college_ids)])}), 302,
+                 prepare=lambda: f.created_ids('course', 'course_code', 'BENCH')),
+        Scenario('course-delete', 'POST', lambda i: (f"/course/delete/{f.pick('course', i)}", {}), 302),
+        Scenario('college-add', 'POST',
+                 lambda i: ('/college/add', {'college_name': f'Bench College {i}', 'college_code': f'BENCH{i}'}), 302),
+        Scenario('college-edit', 'POST',
+                 lambda i: (f"/college/edit/{f.pick('college', i)}",
+                            {'college_name': f'Bench College {i} (edited)', 'college_code': f'BENCH{i}'}), 302,
+                 prepare=lambda: f.created_ids('college', 'college_code', 'BENCH')),
+        Scenario('college-delete', 'POST', lambda i: (f"/college/delete/{f.pick('college', i)}", {}), 302),
+    ]
+    return scenarios
+
+
+# ---------- RUNNER ----------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(driver, scenario, requests, warmup=0, concurrency=1):
+    def one(i):
+        path, data = scenario.make(i)
+        start = time.perf_counter()
+        try:
+            ok = driver.request(scenario.method, path, data) == scenario.expect
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    # Requests always run on pool threads: they have no app context of their
+    # own, so each test-client request gets a fresh one, as under a real server
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if scenario.method == 'GET':
+            list(pool.map(one, range(warmup)))
+        started = time.perf_counter()
+        samples = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - started
+
+    timings = sorted(ms for ms, _ in samples)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in samples if not ok),
+        'throughput_rps': requests / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.fmean(timings) if timings else 0.0,
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'p99_ms': percentile(timings, 99),
+        'max_ms': timings[-1] if timings else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(driver, app, requests=100, warmup=5, concurrency=1, only=None, writes=True, log=print):
+    """Run every scenario (or those named in `only`) and return a JSON-able report."""
+    fixture = Fixture()
+    report = {
+        'commit': git_commit(),
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'driver': driver.name,
+        'python': platform.python_version(),
+        'settings': {'requests': requests, 'warmup': warmup, 'concurrency': concurrency,
+                     'response_cache': app.config.get('RESPONSE_CACHE_BACKEND')},
+        'data': {'students': fixture.students, 'courses': len(fixture.courses),
+                 'colleges': len(fixture.colleges)},
+        'scenarios': {},
+    }
+    for scenario in build_scenarios(fixture, writes=writes):
+        if only and scenario.name not in only:
+            continue
+        if scenario.prepare is not None:
+            scenario.prepare()
+        result = report['scenarios'][scenario.name] = run_scenario(
+            driver, scenario, requests, warmup=warmup, concurrency=concurrency)
+        log(f"{scenario.name:<24} {result['throughput_rps']:>9.1f} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>6}")
+    return report
+
+
+def compare(base, head):
+    """Rows of (scenario, base p50, head p50, change %, base p95, head p95, change %)."""
+    rows = []
+    for name, new in head['scenarios'].items():
+        old = base['scenarios'].get(name)
+        if old is None:
+            continue
+
+        def change(key):
+            return (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        rows.append((name, old['p50_ms'], new['p50_ms'], change('p50_ms'),
+                     old['p95_ms'], new['p95_ms'], change('p95_ms')))
+    return rows
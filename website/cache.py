@@ -0,0 +1,111 @@
+import threading
+import time
+
+from flask import g, has_app_context
+
+from website.db import mysql
+
+
+def bump_versions(cur, *tables):
+    # Run inside the writing transaction so other workers see the new version
+    # exactly when they can see the new rows.
+    placeholders = ', '.join(['%s'] * len(tables))
+    cur.execute(
+        f"UPDATE table_version SET version = version + 1 WHERE table_name IN ({placeholders})",
+        tables
+    )
+
+
+class ReferenceCache:
+    """Process-local cache for small, rarely changing lookup data (course and
+    college dropdowns). Entries expire after a TTL and are dropped as soon as
+    the table_version row of a table they depend on changes, which is checked
+    at most once per check interval so every gunicorn worker converges quickly.
+
+    With replicas the versions are read on the connection that serves the
+    request's reads, once per request (app context), instead of being kept for
+    the process: replicas lag by different amounts, and a version taken from
+    one of them says nothing about the rows another one returns.
+    """
+
+    def __init__(self, ttl=300, check_interval=1.0):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = {}
+        self._versions = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('REFERENCE_CACHE_TTL', self.ttl)
+        self.check_interval = app.config.get('REFERENCE_CACHE_CHECK_INTERVAL', self.check_interval)
+
+    def get(self, key, tables, loader):
+        if mysql.pinned_to_primary():
+            return loader()
+        versions = self.versions(*tables)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, entry_versions, value = entry
+            if expires_at > now and entry_versions == versions:
+                return value
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, versions, value)
+        return value
+
+    def version(self, table):
+        # Latest known version of a table (see versions())
+        return self.versions(table)[0]
+
+    def invalidate(self, *tables):
+        # Local writes don't wait for the next version check. With replicas
+        # there is nothing to bump: every request reads its replica's own row.
+        if mysql.has_replicas:
+            return
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            self._checked_at = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._checked_at = 0.0
+
+    def versions(self, *tables):
+        if mysql.has_replicas and has_app_context():
+            versions = g.get('_table_versions')
+            if versions is None:
+                # The replica (or, when pinned, the primary) this request reads from
+                versions = g._table_versions = dict(self._read_versions(mysql.read_connection))
+        else:
+            self._refresh_versions()
+            versions = self._versions
+        return tuple(versions.get(t, 0) for t in tables)
+
+    @staticmethod
+    def _read_versions(connection):
+        cur = connection.cursor()
+        cur.execute("SELECT table_name, version FROM table_version")
+        rows = cur.fetchall()
+        cur.close()
+        return rows
+
+    def _refresh_versions(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        rows = self._read_versions(mysql.connection)
+        with self._lock:
+            for table, version in rows:
+                # Never move backwards past a local invalidation
+                self._versions[table] = max(version, self._versions.get(table, 0))
+            self._checked_at = now
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,236 @@
+import json
+import os
+import statistics
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from . import benchmark, datagen
+from .db import mysql
+from .db import migrate
+from .importer import StudentImporter, iter_rows
+from .models import counters, enrollment
+from .models.studentdb import Student
+
+
+def register_commands(app):
+    app.cli.add_command(bench_search)
+    app.cli.add_command(import_students)
+    app.cli.add_command(db)
+    app.cli.add_command(reconcile_counts)
+    app.cli.add_command(rebuild_stats)
+    app.cli.add_command(seed_data)
+    app.cli.add_command(bench)
+    app.cli.add_command(students)
+
+
+def _time_calls(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return result, statistics.median(timings), p95
+
+
+@click.command('bench-search')
+@click.argument('queries', nargs=-1, required=True)
+@click.option('--runs', default=20, show_default=True, help='Repetitions per query and path.')
+@click.option('--per-page', default=10, show_default=True)
+@with_appcontext
+def bench_search(queries, runs, per_page):
+    """Compare the legacy LIKE search with the FULLTEXT search (page + count)."""
+    paths = {
+        'like': lambda q: (Student.search_students_paginated(q, 0, per_page), Student.count_students_search(q)),
+        'fulltext': lambda q: (Student.search_students_ranked(q, 0, per_page), Student.count_students_ranked(q)),
+    }
+    click.echo(f"{'query':<24} {'path':<9} {'matches':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for query in queries:
+        for name, fn in paths.items():
+            (_, total), p50, p95 = _time_calls(lambda: fn(query), runs)
+            click.echo(f"{query:<24} {name:<9} {total:>8} {p50:>9.2f} {p95:>9.2f}")
+
+
+@click.command('import-students')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per INSERT batch and commit.')
+@with_appcontext
+def import_students(path, chunk_size):
+    """Stream students from a CSV or XLSX file into the database."""
+    with open(path, 'rb') as f:
+        try:
+            report = StudentImporter(chunk_size=chunk_size).run(iter_rows(f, path))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    for line, message in report.errors:
+        click.echo(f"line {line}: {message}", err=True)
+    if report.error_count > len(report.errors):
+        click.echo(f"... {report.error_count - len(report.errors)} more problems not shown", err=True)
+    click.echo(f"{report.processed} rows read, {report.inserted} added, {report.skipped} skipped "
+               f"in {report.elapsed:.2f}s ({report.rows_per_second:.0f} rows/s)")
+
+
+@click.group('db')
+def db():
+    """Schema migrations."""
+
+
+@db.command('upgrade')
+@click.option('--to', 'target', type=int, default=None, help='Stop after this migration version.')
+@with_appcontext
+def db_upgrade(target):
+    """Apply pending migrations."""
+    applied = migrate.upgrade(mysql, target=target, log=click.echo)
+    click.echo(f"Applied {len(applied)} migration(s)." if applied else "Schema is up to date.")
+
+
+@db.command('status')
+@with_appcontext
+def db_status():
+    """Show applied and pending migrations."""
+    cur = mysql.connection.cursor()
+    applied = {version: applied_at for version, _, applied_at in migrate.applied_migrations(cur, mysql.dialect)}
+    cur.close()
+    for migration in migrate.available_migrations(mysql.dialect):
+        state = f"applied {applied[migration.version]}" if migration.version in applied else "pending"
+        click.echo(f"{migration.version:04d}_{migration.name:<32} {state}")
+
+
+@click.command('reconcile-counts')
+@with_appcontext
+def reconcile_counts():
+    """Recompute the maintained row counters from the tables (run from cron)."""
+    for table, (old, new) in counters.reconcile().items():
+        note = '' if old == new else f' (was {old})'
+        click.echo(f"{table:<10} {new}{note}")
+
+
+@click.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats():
+    """Recompute the dashboard's enrollment stats from the student table."""
+    for dimension, rows in enrollment.rebuild().items():
+        click.echo(f"{dimension:<10} {rows} rows")
+
+
+@click.command('seed-data')
+@click.option('--students', default=10000, show_default=True)
+@click.option('--courses', default=40, show_default=True)
+@click.option('--colleges', default=8, show_default=True)
+@click.option('--seed', default=42, show_default=True, help='Same seed, same rows.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Students per INSERT batch and commit.')
+@click.option('--reset', is_flag=True, help='Delete all colleges, courses and students first.')
+@with_appcontext
+def seed_data(students, courses, colleges, seed, chunk_size, reset):
+    """Fill the database with a synthetic roster for benchmarking."""
+    if reset:
+        datagen.reset()
+    start = time.perf_counter()
+    created = datagen.generate(colleges=colleges, courses=courses, students=students, seed=seed,
+                               chunk_size=chunk_size, log=click.echo)
+    click.echo(f"Seeded {created['students']} students in {time.perf_counter() - start:.1f}s")
+
+
+@click.group('bench')
+def bench():
+    """Route benchmarks."""
+
+
+@bench.command('run')
+@click.option('--url', default=None, help='Benchmark a running server instead of the in-process test client.')
+@click.option('--requests', 'requests_', default=100, show_default=True, help='Requests per scenario.')
+@click.option('--warmup', default=5, show_default=True, help='Untimed requests before each read scenario.')
+@click.option('--concurrency', default=1, show_default=True)
+@click.option('--only', multiple=True, help='Scenario name; repeat to pick several.')
+@click.option('--read-only', is_flag=True, help='Skip the add/edit/delete scenarios.')
+@click.option('--out', type=click.Path(dir_okay=False), default=None,
+              help='Result file (default: bench-results/<commit>.json).')
+@with_appcontext
+def bench_run(url, requests_, warmup, concurrency, only, read_only, out):
+    """Drive every blueprint route and report throughput and p50/p95/p99."""
+    app = current_app._get_current_object()
+    driver = benchmark.HttpDriver(url) if url else benchmark.ClientDriver(app)
+    click.echo(f"{'scenario':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    report = benchmark.run(driver, app, requests=requests_, warmup=warmup, concurrency=concurrency,
+                           only=set(only), writes=not read_only, log=click.echo)
+
+    out = out or os.path.join('bench-results', f"{report['commit'] or time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    click.echo(f"Results written to {out}")
+
+
+@bench.command('compare')
+@click.argument('base', type=click.File('r'))
+@click.argument('head', type=click.File('r'))
+def bench_compare(base, head):
+    """Compare two result files (e.g. before and after a change)."""
+    base, head = json.load(base), json.load(head)
+    click.echo(f"{base.get('commit')} -> {head.get('commit')}")
+    click.echo(f"{'scenario':<24} {'p50 ms':>17} {'change':>8} {'p95 ms':>17} {'change':>8}")
+    for name, old50, new50, d50, old95, new95, d95 in benchmark.compare(base, head):
+        click.echo(f"{name:<24} {old50:>8.2f}{new50:>9.2f} {d50:>+7.1f}% {old95:>8.2f}{new95:>9.2f} {d95:>+7.1f}%")
+
+
+@click.group('students')
+def students():
+    """Bulk changes to students, chunk by chunk.
+
+    QUERY uses the search box syntax, e.g. "year:4" or "course:BSCS"; without
+    one (and without --id) the change applies to every student.
+    """
+
+
+def _bulk_options(fn):
+    fn = click.option('--id', 'ids', type=int, multiple=True, help='Student primary key; repeat for several.')(fn)
+    fn = click.option('--chunk-size', default=None, type=int, help='Students per transaction (default: BULK_CHUNK_SIZE).')(fn)
+    return click.argument('query', required=False)(fn)
+
+
+def _run_bulk(method, query, ids, chunk_size, **kwargs):
+    def progress(done, total):
+        click.echo(f"{done}/{total} students", err=True)
+    try:
+        return method(ids=ids or None, query=query, progress=progress,
+                      chunk_size=chunk_size or current_app.config['BULK_CHUNK_SIZE'], **kwargs)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+@students.command('promote')
+@_bulk_options
+@click.option('--by', default=1, show_default=True, help='Year levels to move (negative to move back).')
+@with_appcontext
+def students_promote(query, ids, chunk_size, by):
+    """Move students up a year level; nobody goes past year 4 or below year 1."""
+    count = _run_bulk(Student.promote, query, ids, chunk_size, by=by)
+    click.echo(f"{count} students moved by {by:+d} year(s).")
+
+
+@students.command('set-course')
+@_bulk_options
+@click.option('--to', 'course_code', required=True, help='Code of the course to move students to.')
+@with_appcontext
+def students_set_course(query, ids, chunk_size, course_code):
+    """Move students to another course (and that course's college)."""
+    course = next((c for c in Student.get_courses() if c['course_code'].lower() == course_code.lower()), None)
+    if course is None:
+        raise click.ClickException(f"Unknown course code {course_code}.")
+    count = _run_bulk(Student.set_course, query, ids, chunk_size, course_id=course['id'])
+    click.echo(f"{count} students moved to {course['course_code']}.")
+
+
+@students.command('delete')
+@_bulk_options
+@click.confirmation_option(prompt='Delete the matching students?')
+@with_appcontext
+def students_delete(query, ids, chunk_size):
+    """Delete students."""
+    count = _run_bulk(Student.delete_many, query, ids, chunk_size)
+    click.echo(f"{count} students deleted.")
@@ -10,8 +10,73 @@ class Config:
     MYSQL_PASSWORD = getenv('MYSQL_PASSWORD')
     MYSQL_DATABASE = getenv('MYSQL_DATABASE')
 
+    # Read replicas for the list/search/count queries, "host[:port]" comma-separated
+    # (same user, password and database as MYSQL_HOST), and how long after a write
+    # that user's reads stay on the primary
+    MYSQL_REPLICAS = getenv('MYSQL_REPLICAS')
+    READ_YOUR_WRITES_SECONDS = float(getenv('READ_YOUR_WRITES_SECONDS', 5))
+
+    # "mysql" (default) or "sqlite" for an embedded database file; SQLITE_PATH
+    # defaults to instance/ssis.sqlite3, ":memory:" for tests and benchmarks
+    DB_BACKEND = getenv('DB_BACKEND', 'mysql')
+    SQLITE_PATH = getenv('SQLITE_PATH')
+
     CLOUDY_NAME = getenv('CLOUDY_NAME')
     CLOUDY_KEY = getenv('CLOUDY_KEY')
     CLOUDY_SECRET = getenv('CLOUDY_SECRET')
     CLOUDY_URL = getenv('CLOUDY_URL')
-    CLOUDY_FOLDER = getenv('CLOUDY_FOLDER')
\ No newline at end of file
+    CLOUDY_FOLDER = getenv('CLOUDY_FOLDER')
+
+    # Above this many rows the list pages hand out cursor links instead of page numbers
+    KEYSET_PAGINATION_THRESHOLD = int(getenv('KEYSET_PAGINATION_THRESHOLD', 1000))
+
+    # Course/college dropdown cache: entry lifetime and how often table versions are re-read
+    REFERENCE_CACHE_TTL = int(getenv('REFERENCE_CACHE_TTL', 300))
+    REFERENCE_CACHE_CHECK_INTERVAL = float(getenv('REFERENCE_CACHE_CHECK_INTERVAL', 1.0))
+
+    # Connection pool per worker process: kept-open size, burst overflow, borrow timeout (s),
+    # max connection age (s) and whether to ping connections before handing them out
+    MYSQL_POOL_SIZE = int(getenv('MYSQL_POOL_SIZE', 5))
+    MYSQL_POOL_MAX_OVERFLOW = int(getenv('MYSQL_POOL_MAX_OVERFLOW', 10))
+    MYSQL_POOL_TIMEOUT = float(getenv('MYSQL_POOL_TIMEOUT', 30))
+    MYSQL_POOL_RECYCLE = int(getenv('MYSQL_POOL_RECYCLE', 3600))
+    MYSQL_POOL_PRE_PING = getenv('MYSQL_POOL_PRE_PING', '1') == '1'
+
+    # Photo uploads: 'cloudinary' or 'local' storage, background worker threads,
+    # retry count and base backoff (s). PHOTO_UPLOAD_ASYNC=0 uploads inline (tests).
+    PHOTO_STORAGE = getenv('PHOTO_STORAGE', 'cloudinary')
+    PHOTO_LOCAL_DIR = getenv('PHOTO_LOCAL_DIR')
+    PHOTO_UPLOAD_WORKERS = int(getenv('PHOTO_UPLOAD_WORKERS', 4))
+    PHOTO_UPLOAD_RETRIES = int(getenv('PHOTO_UPLOAD_RETRIES', 3))
+    PHOTO_UPLOAD_BACKOFF = float(getenv('PHOTO_UPLOAD_BACKOFF', 1.0))
+    PHOTO_UPLOAD_ASYNC = getenv('PHOTO_UPLOAD_ASYNC', '1') == '1'
+
+    # Apply pending schema migrations at boot (a single version read when current)
+    MIGRATE_ON_STARTUP = getenv('MIGRATE_ON_STARTUP', '1') == '1'
+
+    # Search result counts stop at this many matches and are shown as "N+"
+    SEARCH_EXACT_COUNT_LIMIT = int(getenv('SEARCH_EXACT_COUNT_LIMIT', 1000))
+
+    # Typeahead prefix index over student IDs and names, built per worker at boot,
+    # and the seconds between checks for changes made by other workers
+    SUGGEST_INDEX = getenv('SUGGEST_INDEX', '1') == '1'
+    SUGGEST_REFRESH_INTERVAL = int(getenv('SUGGEST_REFRESH_INTERVAL', 300))
+
+    # Students locked and changed per transaction by the bulk actions
+    BULK_CHUNK_SIZE = int(getenv('BULK_CHUNK_SIZE', 500))
+
+    # Seconds between in-process row counter reconciles (0 = only via "flask reconcile-counts")
+    COUNTER_RECONCILE_INTERVAL = int(getenv('COUNTER_RECONCILE_INTERVAL', 0))
+
+    # Rendered list/search pages: "memory" (LRU per worker), "redis" (shared, needs
+    # RESPONSE_CACHE_URL and the redis package) or "none"; TTL only applies to redis
+    RESPONSE_CACHE_BACKEND = getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_URL = getenv('RESPONSE_CACHE_URL')
+    RESPONSE_CACHE_SIZE = int(getenv('RESPONSE_CACHE_SIZE', 256))
+    RESPONSE_CACHE_TTL = int(getenv('RESPONSE_CACHE_TTL', 600))
+
+    # SQL instrumentation: per-request query stats, slow query log threshold (ms)
+    # and how many identical statements in one request get logged as repeats
+    SQL_INSTRUMENTATION = getenv('SQL_INSTRUMENTATION', '1') == '1'
+    SQL_SLOW_QUERY_MS = float(getenv('SQL_SLOW_QUERY_MS', 200))
+    SQL_REPEAT_THRESHOLD = int(getenv('SQL_REPEAT_THRESHOLD', 2))
@@ -0,0 +1,139 @@
+import itertools
+import random
+
+from website import mysql
+from website.cache import bump_versions, reference_cache
+from website.models import counters
+from website.models.studentdb import Student
+from website.suggest import suggest_index
+
+# Weighted towards the front: common names repeat like they do on a real roster
+FIRST_NAMES = [
+    'Maria', 'John', 'Mark', 'Angel', 'Christian', 'Joshua', 'Jasmine', 'Michael', 'Kyla', 'Nicole',
+    'Paul', 'Princess', 'James', 'Angelica', 'Justin', 'Mary', 'Kenneth', 'Andrea', 'Carlo', 'Jerome',
+    'Patricia', 'Daniel', 'Bea', 'Francis', 'Camille', 'Kevin', 'Sofia', 'Miguel', 'Erika', 'Rafael',
+    'Janelle', 'Vincent', 'Trisha', 'Gabriel', 'Rhea', 'Adrian', 'Kimberly', 'Joseph', 'Aira', 'Lance',
+    'Clarisse', 'Noel', 'Hannah', 'Ramon', 'Jolina', 'Elijah', 'Czarina', 'Dominic', 'Faith', 'Neil',
+]
+LAST_NAMES = [
+    'Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Gonzales',
+    'Villanueva', 'Castillo', 'Rivera', 'Aquino', 'Navarro', 'Salazar', 'Mercado', 'Dela Cruz', 'Lim', 'Tan',
+    'Castro', 'Del Rosario', 'Pascual', 'Domingo', 'Soriano', 'Valdez', 'Gutierrez', 'Manalo', 'Ocampo', 'Fernandez',
+    'Abdullah', 'Macaraya', 'Pangandaman', 'Alonto', 'Dimaporo', 'Sarip', 'Usman', 'Lucman', 'Batua', 'Ampaso',
+    'Cabahug', 'Sumampong', 'Labadan', 'Pacana', 'Ybanez', 'Cagas', 'Estrada', 'Jumawan', 'Lagura', 'Omandam',
+]
+COLLEGES = [
+    ('College of Computer Studies', 'CCS',
+     ['Computer Science', 'Information Technology', 'Information Systems', 'Computer Application']),
+    ('College of Engineering', 'COE',
+     ['Civil Engineering', 'Electrical Engineering', 'Mechanical Engineering', 'Chemical Engineering',
+      'Computer Engineering', 'Metallurgical Engineering', 'Ceramics Engineering', 'Mining Engineering']),
+    ('College of Science and Mathematics', 'CSM',
+     ['Biology', 'Chemistry', 'Mathematics', 'Physics', 'Statistics', 'Marine Biology']),
+    ('College of Education', 'CED',
+     ['Elementary Education', 'Secondary Education', 'Physical Education', 'Technology Teacher Education']),
+    ('College of Arts and Social Sciences', 'CASS',
+     ['Psychology', 'History', 'Political Science', 'Sociology', 'English', 'Filipino', 'Philosophy']),
+    ('College of Economics, Business and Accountancy', 'CEBA',
+     ['Accountancy', 'Economics', 'Entrepreneurship', 'Marketing', 'Hospitality Management']),
+    ('College of Nursing', 'CON', ['Nursing']),
+    ('College of Health Sciences', 'CHS', ['Medical Technology', 'Nutrition and Dietetics', 'Pharmacy']),
+]
+
+
+def _zipf_weights(n, s=1.1):
+    # Cumulative, so random.choices doesn't re-sum them on every call
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _abbreviation(name):
+    return ''.join(word[0] for word in name.replace(',', '').split() if word[0].isupper())
+
+
+def _colleges(count):
+    for i in range(count):
+        name, code, programs = COLLEGES[i % len(COLLEGES)]
+        if i >= len(COLLEGES):
+            suffix = i // len(COLLEGES) + 1
+            name, code = f'{name} {suffix}', f'{code}{suffix}'
+        yield name, code, programs
+
+
+def generate(colleges=8, courses=40, students=10000, seed=42, chunk_size=5000, log=print):
+    """Seed a reproducible roster: the same arguments always produce the same
+    rows. Courses are spread over the colleges, and students over the courses
+    with a Zipf skew so a few programs are much larger than the rest."""
+    rng = random.Random(seed)
+    conn = mysql.connection
+    cur = conn.cursor()
+
+    college_rows = list(_colleges(colleges))
+    cur.executemany("INSERT INTO college (college_name, college_code) VALUES (%s, %s)",
+                    [(name, code) for name, code, _ in college_rows])
+    cur.execute("SELECT id, college_code FROM college")
+    college_ids = {code: id for id, code in cur.fetchall()}
+
+    course_rows, names, codes = [], set(), set()
+    programs = itertools.cycle([(code, program) for _, code, programs in college_rows for program in programs])
+    for _ in range(courses):
+        college_code, program = next(programs)
+        name, code, n = f'Bachelor of Science in {program}', f'BS{_abbreviation(program)}', 2
+        while name in names or code in codes:
+            # Second round of the program list, or two programs sharing an abbreviation
+            name, code, n = f'Bachelor of Science in {program} {n}', f'BS{_abbreviation(program)}{n}', n + 1
+        names.add(name)
+        codes.add(code)
+        course_rows.append((name, code, college_ids[college_code]))
+    cur.executemany("INSERT INTO course (course_name, course_code, college_id) VALUES (%s, %s, %s)",
+                    course_rows)
+    counters.adjust(cur, 'college', len(college_rows))
+    counters.adjust(cur, 'course', len(course_rows))
+    bump_versions(cur, 'college', 'course')
+    conn.commit()
+    reference_cache.invalidate('college', 'course')
+    log(f'{len(college_rows)} colleges, {len(course_rows)} courses')
+
+    # Fixed order before the shuffle, so a seed gives the same rows on every backend
+    cur.execute("SELECT id, college_id FROM course ORDER BY id")
+    course_choices = cur.fetchall()
+    cur.close()
+    rng.shuffle(course_choices)
+    course_weights = _zipf_weights(len(course_choices), 0.8)
+    first_weights = _zipf_weights(len(FIRST_NAMES))
+    last_weights = _zipf_weights(len(LAST_NAMES))
+
+    # Four cohorts of roughly equal size, one per year level; IDs look like 2023-0042
+    years = list(range(2022, 2026))
+    per_cohort = -(-students // len(years))
+    width = max(4, len(str(per_cohort)))
+    written = 0
+    while written < students:
+        size = min(chunk_size, students - written)
+        picks = zip(rng.choices(course_choices, cum_weights=course_weights, k=size),
+                    rng.choices(FIRST_NAMES, cum_weights=first_weights, k=size),
+                    rng.choices(LAST_NAMES, cum_weights=last_weights, k=size),
+                    rng.choices(('Male', 'Female'), k=size))
+        rows = []
+        for n, ((course_id, college_id), first_name, last_name, gender) in enumerate(picks, start=written):
+            cohort = years[n % len(years)]
+            rows.append((f'{cohort}-{n // len(years):0{width}d}', first_name, last_name, gender,
+                         2026 - cohort, course_id, college_id, ''))
+        Student.insert_many(rows)
+        written += size
+        log(f'{written}/{students} students')
+    return {'colleges': len(college_rows), 'courses': len(course_rows), 'students': written}
+
+
+def reset():
+    """Empty the roster tables and their derived counts."""
+    conn = mysql.connection
+    cur = conn.cursor()
+    for table in ('student', 'course', 'college'):
+        cur.execute(f"DELETE FROM {table}")
+    cur.execute("DELETE FROM enrollment_stat")
+    cur.execute("UPDATE row_counter SET row_count = 0")
+    bump_versions(cur, 'college', 'course', 'student')
+    conn.commit()
+    cur.close()
+    reference_cache.invalidate('college', 'course', 'student')
+    suggest_index.invalidate()
@@ -1,5 +1,77 @@
-from flask_mysql_connector import MySQL
+import time
 
-from .create_tables import create_tables
+from flask import has_request_context, request, session
 
-mysql = MySQL()
\ No newline at end of file
+from .pool import MySQL
+from .sqlite import SQLite
+
+from .migrate import migrate_on_startup
+
+BACKENDS = {'mysql': MySQL, 'sqlite': SQLite}
+
+# Session key: reads go to the primary until this timestamp
+PRIMARY_UNTIL = '_db_primary_until'
+
+
+class Database:
+    """The `mysql` handle the models import. DB_BACKEND picks what is behind
+    it: the pooled MySQL server (default) or an embedded SQLite file.
+
+    Writes use `connection` (the primary). Read-only model methods use
+    `read_connection`, which is a replica when MYSQL_REPLICAS is set, except
+    while the request is pinned to the primary (see pinned_to_primary).
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.read_your_writes_seconds = 5.0
+
+    def init_app(self, app):
+        name = app.config.get('DB_BACKEND', 'mysql')
+        if name not in BACKENDS:
+            raise ValueError(f'Unknown DB_BACKEND {name!r}')
+        self.backend = BACKENDS[name]()
+        self.backend.init_app(app)
+        self.read_your_writes_seconds = app.config.get('READ_YOUR_WRITES_SECONDS', self.read_your_writes_seconds)
+        if self.has_replicas:
+            app.after_request(self._pin_after_write)
+
+    @property
+    def has_replicas(self):
+        return self.backend.has_replicas
+
+    def pinned_to_primary(self):
+        """With replicas: True outside requests, during a POST (it reads what
+        it is about to change) and for READ_YOUR_WRITES_SECONDS after one, so
+        the page a write redirects to shows the write even if the replicas lag.
+        Pinned requests also skip the page and reference caches."""
+        if not self.has_replicas:
+            return False
+        if not has_request_context() or request.method not in ('GET', 'HEAD'):
+            return True
+        return session.get(PRIMARY_UNTIL, 0) > time.time()
+
+    def _pin_after_write(self, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            session[PRIMARY_UNTIL] = time.time() + self.read_your_writes_seconds
+        return response
+
+    @property
+    def dialect(self):
+        return self.backend.dialect
+
+    @property
+    def connection(self):
+        return self.backend.connection
+
+    @property
+    def read_connection(self):
+        if self.has_replicas and not self.pinned_to_primary():
+            return self.backend.read_connection
+        return self.backend.connection
+
+    def pool_stats(self):
+        return self.backend.pool_stats()
+
+
+mysql = Database()
@@ -0,0 +1,150 @@
+import functools
+import os
+import re
+import sqlite3
+
+from website.search import FULLTEXT_COLUMNS
+
+_migrations_root = os.path.join(os.path.dirname(__file__), 'migrations')
+
+
+class MySQLDialect:
+    """The SQL the models are written in; everything here is a pass-through."""
+    name = 'mysql'
+    migrations_path = _migrations_root
+
+    def translate(self, sql):
+        return sql
+
+    # ---------- FULLTEXT ----------
+    def match(self, table):
+        # Predicate with one %s taking fulltext_query(expr)
+        columns = ', '.join(f'{table}.{c}' for c in FULLTEXT_COLUMNS[table])
+        return f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+
+    def match_score(self, table):
+        # Relevance expression with one %s taking fulltext_query(words)
+        return self.match(table)
+
+    def fulltext_query(self, expr):
+        return expr
+
+    # ---------- ERRORS ----------
+    _DUP_KEY_NAME = re.compile(r"for key '(?:\w+\.)?(\w+)'")
+
+    def is_duplicate_key(self, error):
+        from mysql.connector import Error, errorcode
+        return isinstance(error, Error) and error.errno == errorcode.ER_DUP_ENTRY
+
+    def duplicate_key_name(self, error):
+        # "Duplicate entry 'CCS' for key 'college.college_code'" -> "college_code"
+        match = self._DUP_KEY_NAME.search(str(error))
+        return match.group(1) if match else None
+
+    # ---------- TRANSACTIONS ----------
+    def savepoint(self, conn, cur, name):
+        cur.execute(f"SAVEPOINT {name}")
+
+    # ---------- MIGRATIONS ----------
+    def split_statements(self, text):
+        for statement in text.split(';'):
+            if statement.strip():
+                yield statement.strip()
+
+    def lock(self, cur, name, timeout=60):
+        cur.execute("SELECT GET_LOCK(%s, %s)", (name, timeout))
+        return cur.fetchone()[0] == 1
+
+    def unlock(self, cur, name):
+        cur.execute("SELECT RELEASE_LOCK(%s)", (name,))
+        cur.fetchone()
+
+    def begin(self, cur):
+        pass  # DDL commits implicitly in MySQL; the named lock does the serializing
+
+    def is_missing_table(self, error):
+        from mysql.connector import Error, errorcode
+        return isinstance(error, Error) and error.errno == errorcode.ER_NO_SUCH_TABLE
+
+    def is_already_applied(self, error):
+        # Deployments created before migrations existed may already have
+        # these columns/indexes; treat "already there" as applied.
+        from mysql.connector import Error, errorcode
+        return isinstance(error, Error) and error.errno in (errorcode.ER_DUP_FIELDNAME, errorcode.ER_DUP_KEYNAME)
+
+
+class SQLiteDialect(MySQLDialect):
+    """Rewrites the handful of MySQL-only constructs the models use. FULLTEXT
+    maps to FTS5 tables named <table>_fts, kept in sync by triggers (see
+    migrations/sqlite/0003_fulltext_search.sql)."""
+    name = 'sqlite'
+    migrations_path = os.path.join(_migrations_root, 'sqlite')
+
+    _REWRITES = [
+        (re.compile(r'%s'), '?'),
+        (re.compile(r'\bINSERT IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE'),
+        (re.compile(r'\s+FOR UPDATE\b', re.IGNORECASE), ''),
+        # MySQL LIKE escapes with "\" by default; SQLite needs to be told
+        (re.compile(r'\bLIKE \?', re.IGNORECASE), r"LIKE ? ESCAPE '\\'"),
+        (re.compile(r'\bON DUPLICATE KEY UPDATE (\w+) = \1 \+ VALUES\(\1\)', re.IGNORECASE),
+         r'ON CONFLICT DO UPDATE SET \1 = \1 + excluded.\1'),
+    ]
+
+    @functools.lru_cache(maxsize=1024)
+    def translate(self, sql):
+        for pattern, replacement in self._REWRITES:
+            sql = pattern.sub(replacement, sql)
+        return sql
+
+    def match(self, table):
+        return f"{table}.id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s)"
+
+    def match_score(self, table):
+        # bm25() is lower-is-better; negate it so ORDER BY score DESC still works
+        return (f"COALESCE((SELECT -bm25({table}_fts) FROM {table}_fts "
+                f"WHERE {table}_fts MATCH %s AND rowid = {table}.id), 0)")
+
+    def fulltext_query(self, expr):
+        # "+dela* +cruz*" (all required) -> '"dela"* AND "cruz"*'; "dela* cruz*" -> OR
+        words = expr.split()
+        joiner = ' AND ' if all(w.startswith('+') for w in words) else ' OR '
+        return joiner.join(f'"{w.strip("+*")}"*' for w in words)
+
+    _DUP_KEY_NAME = re.compile(r'UNIQUE constraint failed: \w+\.(\w+)')
+
+    def is_duplicate_key(self, error):
+        return isinstance(error, sqlite3.IntegrityError) and 'UNIQUE constraint failed' in str(error)
+
+    def savepoint(self, conn, cur, name):
+        # Outside a transaction SAVEPOINT starts one that its RELEASE would commit
+        if not conn.in_transaction:
+            cur.execute("BEGIN")
+        cur.execute(f"SAVEPOINT {name}")
+
+    def split_statements(self, text):
+        # Trigger bodies contain ";", so only cut where SQLite agrees a statement ends
+        statement = ''
+        for part in text.split(';'):
+            statement += part + ';'
+            if sqlite3.complete_statement(statement):
+                if statement.strip(' \n;'):
+                    yield statement.strip()
+                statement = ''
+
+    def lock(self, cur, name, timeout=60):
+        return True  # writers are serialized by begin() below
+
+    def unlock(self, cur, name):
+        pass
+
+    def begin(self, cur):
+        # Takes the database write lock up front, and SQLite DDL is
+        # transactional, so each migration applies completely or not at all
+        cur.execute("BEGIN IMMEDIATE")
+
+    def is_missing_table(self, error):
+        return isinstance(error, sqlite3.OperationalError) and 'no such table' in str(error)
+
+    def is_already_applied(self, error):
+        return isinstance(error, sqlite3.OperationalError) and (
+            'duplicate column name' in str(error) or 'already exists' in str(error))
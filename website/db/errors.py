@@ -0,0 +1,13 @@
+class DuplicateKeyError(Exception):
+    """A write hit a UNIQUE index. `key` names the index (its column, for the
+    single-column ones in this schema) when the database reports it."""
+
+    def __init__(self, key=None):
+        super().__init__(f'Duplicate value for {key or "a unique key"}')
+        self.key = key
+
+
+def raise_if_duplicate(error, dialect):
+    # Call from an `except` block after rolling back
+    if dialect.is_duplicate_key(error):
+        raise DuplicateKeyError(dialect.duplicate_key_name(error)) from error
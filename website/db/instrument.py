@@ -0,0 +1,123 @@
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g
+
+from website import metrics
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """Statement shape without literals, so `WHERE id IN (%s, %s)` and
+    `WHERE id IN (%s)` count as one query."""
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryStats:
+    """SQL work done inside one app context (request, CLI command, worker job)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._calls = Counter()
+
+    def record(self, sql, params, elapsed):
+        self.count += 1
+        self.seconds += elapsed
+        try:
+            self._calls[(sql, params if params is None else tuple(params))] += 1
+        except TypeError:
+            pass  # unhashable params (dict); such calls are simply not checked for repeats
+
+    def repeats(self, threshold):
+        for (sql, params), count in self._calls.items():
+            if count >= threshold:
+                yield (fingerprint(sql), params), count
+
+
+def _stats():
+    stats = g.get('_sql_stats')
+    if stats is None:
+        stats = g._sql_stats = QueryStats()
+    return stats
+
+
+class InstrumentedCursor:
+    """Wraps a mysql.connector cursor: times each statement, counts the rows
+    fetched from it and logs those slower than SQL_SLOW_QUERY_MS."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._fingerprint = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._rows(1)
+            yield row
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._record(sql, params, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            self._record(sql, None, time.perf_counter() - start)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows(len(rows))
+        return rows
+
+    def _record(self, sql, params, elapsed):
+        self._fingerprint = fingerprint(sql)
+        _stats().record(sql, params, elapsed)
+        metrics.sql_queries.inc(1, self._fingerprint)
+        metrics.sql_seconds.inc(elapsed, self._fingerprint)
+        if elapsed * 1000 >= current_app.config.get('SQL_SLOW_QUERY_MS', 200):
+            metrics.sql_slow.inc(1, self._fingerprint)
+            current_app.logger.warning('Slow query (%.1f ms): %s', elapsed * 1000, self._fingerprint)
+
+    def _rows(self, count):
+        if count and self._fingerprint is not None:
+            metrics.sql_rows.inc(count, self._fingerprint)
+
+
+class InstrumentedConnection:
+    """Hands out InstrumentedCursors; everything else goes to the real connection."""
+
+    def __init__(self, connection):
+        self.raw = connection
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.raw.cursor(*args, **kwargs))
@@ -0,0 +1,117 @@
+import os
+import re
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+_LOCK_NAME = 'ssis_schema_migrate'
+
+
+class Migration:
+    def __init__(self, version, name, path, dialect):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.dialect = dialect
+
+    def statements(self):
+        # Whole-line "--" comments are dropped first so they may contain ";"
+        with open(self.path, 'r') as f:
+            lines = [line for line in f if not line.strip().startswith('--')]
+        return self.dialect.split_statements(''.join(lines))
+
+
+def available_migrations(dialect):
+    # Each dialect has its own directory; version numbers line up across them
+    migrations = []
+    for filename in os.listdir(dialect.migrations_path):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2),
+                                        os.path.join(dialect.migrations_path, filename), dialect))
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def latest_version(dialect):
+    migrations = available_migrations(dialect)
+    return migrations[-1].version if migrations else 0
+
+
+def current_version(cur, dialect):
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_version")
+    except Exception as e:
+        if dialect.is_missing_table(e):
+            return 0
+        raise
+    version = cur.fetchone()[0]
+    return version or 0
+
+
+def applied_migrations(cur, dialect):
+    if current_version(cur, dialect) == 0:
+        return []
+    cur.execute("SELECT version, name, applied_at FROM schema_version ORDER BY version")
+    return cur.fetchall()
+
+
+def is_current(mysql):
+    cur = mysql.connection.cursor()
+    try:
+        return current_version(cur, mysql.dialect) >= latest_version(mysql.dialect)
+    finally:
+        cur.close()
+
+
+def upgrade(mysql, target=None, log=print):
+    """Apply pending migrations up to `target` (default: latest). Returns the
+    list of versions applied. A MySQL named lock (SQLite: the database write
+    lock) keeps concurrently booting workers from running the same migration twice."""
+    dialect = mysql.dialect
+    conn = mysql.connection
+    cur = conn.cursor()
+    if not dialect.lock(cur, _LOCK_NAME):
+        cur.close()
+        raise RuntimeError('Timed out waiting for another process to finish migrating.')
+
+    applied = []
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        for migration in available_migrations(dialect):
+            if target is not None and migration.version > target:
+                break
+            dialect.begin(cur)
+            if migration.version <= current_version(cur, dialect):
+                conn.commit()
+                continue
+            log(f'Applying migration {migration.version:04d}_{migration.name}')
+            for statement in migration.statements():
+                try:
+                    cur.execute(statement)
+                except Exception as e:
+                    if not dialect.is_already_applied(e):
+                        raise
+            cur.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name))
+            conn.commit()
+            applied.append(migration.version)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        dialect.unlock(cur, _LOCK_NAME)
+        cur.close()
+    return applied
+
+
+def migrate_on_startup(app, mysql):
+    # One indexed MAX() read when the schema is already current
+    with app.app_context():
+        if not is_current(mysql):
+            upgrade(mysql, log=app.logger.info)
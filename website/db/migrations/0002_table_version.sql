@@ -0,0 +1,7 @@
+-- Bumped by model writes; lets every worker notice changes with one cheap read
+CREATE TABLE IF NOT EXISTS table_version (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO table_version (table_name) VALUES ('college'), ('course'), ('student');
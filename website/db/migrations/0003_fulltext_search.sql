@@ -0,0 +1,6 @@
+-- Indexes behind the ranked search (see website/search.py)
+ALTER TABLE student ADD FULLTEXT INDEX ft_student (student_id, first_name, last_name, gender);
+
+ALTER TABLE course ADD FULLTEXT INDEX ft_course (course_code, course_name);
+
+ALTER TABLE college ADD FULLTEXT INDEX ft_college (college_name, college_code);
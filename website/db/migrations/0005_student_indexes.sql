@@ -0,0 +1,13 @@
+-- Name prefix searches (last:, first:, name: and short free-text terms)
+CREATE INDEX idx_student_last_first ON student (last_name, first_name);
+
+CREATE INDEX idx_student_first_name ON student (first_name);
+
+-- year: and gender: filters. InnoDB appends the primary key to every
+-- secondary index, so these also serve "WHERE year = ? ORDER BY id DESC".
+CREATE INDEX idx_student_year ON student (year);
+
+CREATE INDEX idx_student_gender ON student (gender);
+
+-- The duplicate check in Student.is_student_unique leads with student_id,
+-- which is already covered by its UNIQUE index, so it needs nothing extra.
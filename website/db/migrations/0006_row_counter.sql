@@ -0,0 +1,11 @@
+-- Row counts kept up to date by the model insert/delete methods, so list
+-- pages don't need COUNT(*). "flask reconcile-counts" recomputes them.
+CREATE TABLE IF NOT EXISTS row_counter (
+    table_name VARCHAR(64) PRIMARY KEY,
+    row_count BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO row_counter (table_name, row_count)
+SELECT 'college', COUNT(*) FROM college
+UNION ALL SELECT 'course', COUNT(*) FROM course
+UNION ALL SELECT 'student', COUNT(*) FROM student;
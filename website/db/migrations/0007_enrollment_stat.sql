@@ -0,0 +1,15 @@
+-- Student counts per college, course, year and gender for the dashboard.
+-- Student writes adjust them incrementally; "flask rebuild-stats" recomputes
+-- them from the student table. NULL college/course is stored as ''.
+CREATE TABLE IF NOT EXISTS enrollment_stat (
+    dimension VARCHAR(16) NOT NULL,
+    dim_key VARCHAR(64) NOT NULL,
+    student_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, dim_key)
+);
+
+INSERT IGNORE INTO enrollment_stat (dimension, dim_key, student_count)
+SELECT 'college', IFNULL(CAST(college_id AS CHAR), ''), COUNT(*) FROM student GROUP BY college_id
+UNION ALL SELECT 'course', IFNULL(CAST(course_id AS CHAR), ''), COUNT(*) FROM student GROUP BY course_id
+UNION ALL SELECT 'year', CAST(year AS CHAR), COUNT(*) FROM student GROUP BY year
+UNION ALL SELECT 'gender', gender, COUNT(*) FROM student GROUP BY gender;
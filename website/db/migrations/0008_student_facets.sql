@@ -0,0 +1,7 @@
+-- Student list facets: the grouped count over all four facet columns is
+-- answered from this index alone, and with the facet filters as an equality
+-- prefix it also returns "newest first" pages in order (InnoDB appends id).
+CREATE INDEX idx_student_facets ON student (college_id, course_id, year, gender);
+
+-- Class lists: one course sorted by name
+CREATE INDEX idx_student_course_name ON student (course_id, last_name, first_name);
@@ -0,0 +1,8 @@
+-- "<course code> (<college name>)" as shown on the student list and search
+-- pages, stored so those pages read the student table alone. The app keeps it
+-- current (see course_college_sql in models/studentdb.py).
+ALTER TABLE student ADD COLUMN course_college VARCHAR(280) NOT NULL DEFAULT '';
+
+UPDATE student SET course_college = CONCAT(
+    IFNULL((SELECT course_code FROM course WHERE course.id = student.course_id), ''), ' (',
+    IFNULL((SELECT college_name FROM college WHERE college.id = student.college_id), ''), ')');
@@ -0,0 +1,27 @@
+-- SQLite version of the schema (DB_BACKEND=sqlite). Version numbers match
+-- the MySQL migrations one directory up. Text columns use NOCASE so
+-- comparisons and UNIQUE behave like MySQL's default collation.
+CREATE TABLE IF NOT EXISTS college (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    college_name VARCHAR(256) COLLATE NOCASE UNIQUE NOT NULL,
+    college_code VARCHAR(16) COLLATE NOCASE UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS course (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_name VARCHAR(256) COLLATE NOCASE UNIQUE NOT NULL,
+    course_code VARCHAR(16) COLLATE NOCASE UNIQUE NOT NULL,
+    college_id INT REFERENCES college(id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS student (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id VARCHAR(16) COLLATE NOCASE UNIQUE NOT NULL,
+    first_name VARCHAR(256) COLLATE NOCASE NOT NULL,
+    last_name VARCHAR(256) COLLATE NOCASE NOT NULL,
+    gender VARCHAR(16) COLLATE NOCASE NOT NULL,
+    year INT NOT NULL,
+    course_id INT REFERENCES course(id) ON DELETE SET NULL,
+    college_id INT REFERENCES college(id) ON DELETE SET NULL,
+    cloudinary_url VARCHAR(255)
+);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS table_version (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_version (table_name) VALUES ('college'), ('course'), ('student');
@@ -0,0 +1,59 @@
+-- FTS5 stand-ins for the MySQL FULLTEXT indexes. External-content tables
+-- index the base table's rows by id; the triggers keep them in sync.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS student_fts USING fts5(
+    student_id, first_name, last_name, gender, content='student', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS student_fts_insert AFTER INSERT ON student BEGIN
+    INSERT INTO student_fts (rowid, student_id, first_name, last_name, gender) VALUES (new.id, new.student_id, new.first_name, new.last_name, new.gender);
+END;
+
+CREATE TRIGGER IF NOT EXISTS student_fts_delete AFTER DELETE ON student BEGIN
+    INSERT INTO student_fts (student_fts, rowid, student_id, first_name, last_name, gender) VALUES ('delete', old.id, old.student_id, old.first_name, old.last_name, old.gender);
+END;
+
+CREATE TRIGGER IF NOT EXISTS student_fts_update AFTER UPDATE OF student_id, first_name, last_name, gender ON student BEGIN
+    INSERT INTO student_fts (student_fts, rowid, student_id, first_name, last_name, gender) VALUES ('delete', old.id, old.student_id, old.first_name, old.last_name, old.gender);
+    INSERT INTO student_fts (rowid, student_id, first_name, last_name, gender) VALUES (new.id, new.student_id, new.first_name, new.last_name, new.gender);
+END;
+
+INSERT INTO student_fts (student_fts) VALUES ('rebuild');
+
+CREATE VIRTUAL TABLE IF NOT EXISTS course_fts USING fts5(
+    course_code, course_name, content='course', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS course_fts_insert AFTER INSERT ON course BEGIN
+    INSERT INTO course_fts (rowid, course_code, course_name) VALUES (new.id, new.course_code, new.course_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS course_fts_delete AFTER DELETE ON course BEGIN
+    INSERT INTO course_fts (course_fts, rowid, course_code, course_name) VALUES ('delete', old.id, old.course_code, old.course_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS course_fts_update AFTER UPDATE OF course_code, course_name ON course BEGIN
+    INSERT INTO course_fts (course_fts, rowid, course_code, course_name) VALUES ('delete', old.id, old.course_code, old.course_name);
+    INSERT INTO course_fts (rowid, course_code, course_name) VALUES (new.id, new.course_code, new.course_name);
+END;
+
+INSERT INTO course_fts (course_fts) VALUES ('rebuild');
+
+CREATE VIRTUAL TABLE IF NOT EXISTS college_fts USING fts5(
+    college_name, college_code, content='college', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS college_fts_insert AFTER INSERT ON college BEGIN
+    INSERT INTO college_fts (rowid, college_name, college_code) VALUES (new.id, new.college_name, new.college_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS college_fts_delete AFTER DELETE ON college BEGIN
+    INSERT INTO college_fts (college_fts, rowid, college_name, college_code) VALUES ('delete', old.id, old.college_name, old.college_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS college_fts_update AFTER UPDATE OF college_name, college_code ON college BEGIN
+    INSERT INTO college_fts (college_fts, rowid, college_name, college_code) VALUES ('delete', old.id, old.college_name, old.college_code);
+    INSERT INTO college_fts (rowid, college_name, college_code) VALUES (new.id, new.college_name, new.college_code);
+END;
+
+INSERT INTO college_fts (college_fts) VALUES ('rebuild');
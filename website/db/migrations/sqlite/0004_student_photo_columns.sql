@@ -0,0 +1,3 @@
+ALTER TABLE student ADD COLUMN photo_status VARCHAR(16) NOT NULL DEFAULT 'none';
+
+ALTER TABLE student ADD COLUMN thumbnail_url VARCHAR(255);
@@ -0,0 +1,14 @@
+CREATE INDEX IF NOT EXISTS idx_student_last_first ON student (last_name, first_name);
+
+CREATE INDEX IF NOT EXISTS idx_student_first_name ON student (first_name);
+
+CREATE INDEX IF NOT EXISTS idx_student_year ON student (year);
+
+CREATE INDEX IF NOT EXISTS idx_student_gender ON student (gender);
+
+-- MySQL indexes foreign keys on its own; SQLite does not
+CREATE INDEX IF NOT EXISTS idx_student_course ON student (course_id);
+
+CREATE INDEX IF NOT EXISTS idx_student_college ON student (college_id);
+
+CREATE INDEX IF NOT EXISTS idx_course_college ON course (college_id);
@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS row_counter (
+    table_name VARCHAR(64) PRIMARY KEY,
+    row_count BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO row_counter (table_name, row_count)
+SELECT 'college', COUNT(*) FROM college
+UNION ALL SELECT 'course', COUNT(*) FROM course
+UNION ALL SELECT 'student', COUNT(*) FROM student;
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS enrollment_stat (
+    dimension VARCHAR(16) NOT NULL,
+    dim_key VARCHAR(64) NOT NULL,
+    student_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, dim_key)
+);
+
+INSERT OR IGNORE INTO enrollment_stat (dimension, dim_key, student_count)
+SELECT 'college', IFNULL(CAST(college_id AS TEXT), ''), COUNT(*) FROM student GROUP BY college_id
+UNION ALL SELECT 'course', IFNULL(CAST(course_id AS TEXT), ''), COUNT(*) FROM student GROUP BY course_id
+UNION ALL SELECT 'year', CAST(year AS TEXT), COUNT(*) FROM student GROUP BY year
+UNION ALL SELECT 'gender', gender, COUNT(*) FROM student GROUP BY gender;
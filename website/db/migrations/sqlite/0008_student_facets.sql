@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS idx_student_facets ON student (college_id, course_id, year, gender);
+
+CREATE INDEX IF NOT EXISTS idx_student_course_name ON student (course_id, last_name, first_name);
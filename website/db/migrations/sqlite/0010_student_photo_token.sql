@@ -0,0 +1,3 @@
+-- Token of the photo upload a student is waiting for; an upload only stores
+-- its result while the token is still its own
+ALTER TABLE student ADD COLUMN photo_token VARCHAR(32);
@@ -0,0 +1,288 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from flask import current_app, g
+
+from .dialect import MySQLDialect
+from .instrument import InstrumentedConnection
+
+# mysql.connector.connect() argument -> Flask config key
+MYSQL_ARGS = {
+    'user': 'MYSQL_USER',
+    'password': 'MYSQL_PASSWORD',
+    'database': 'MYSQL_DATABASE',
+    'host': 'MYSQL_HOST',
+    'port': 'MYSQL_PORT',
+    'unix_socket': 'MYSQL_UNIX_SOCKET',
+    'charset': 'MYSQL_CHARSET',
+    'collation': 'MYSQL_COLLATION',
+    'connection_timeout': 'MYSQL_CONNECTION_TIMEOUT',
+    'ssl_ca': 'MYSQL_SSL_CA',
+    'ssl_cert': 'MYSQL_SSL_CERT',
+    'ssl_key': 'MYSQL_SSL_KEY',
+    'ssl_disabled': 'MYSQL_SSL_DISABLED',
+    'use_pure': 'MYSQL_USE_PURE',
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Fixed-size pool with bounded overflow.
+
+    Up to `size` connections are kept idle between requests; under load up to
+    `max_overflow` extra connections are opened and closed again on release.
+    Borrowers wait at most `timeout` seconds. Connections older than `recycle`
+    seconds are replaced, and with `pre_ping` each borrowed connection is
+    pinged first so a server-side disconnect never reaches a request.
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=30.0, recycle=3600, pre_ping=True):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._created_at = {}
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self.acquired_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts_total = 0
+        self.created_total = 0
+        self.recycled_total = 0
+        self.ping_failures_total = 0
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts_total += 1
+                    raise PoolTimeout(f'No database connection available after {self.timeout}s')
+                self._cond.wait(remaining)
+
+        try:
+            conn = self._checkout(conn)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._in_use += 1
+            self.acquired_total += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return conn
+
+    def release(self, conn):
+        healthy = True
+        try:
+            # Never hand an open transaction to the next borrower
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.size:
+                self._idle.append(conn)
+                conn = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if conn is not None:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'acquired_total': self.acquired_total,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'timeouts_total': self.timeouts_total,
+                'created_total': self.created_total,
+                'recycled_total': self.recycled_total,
+                'ping_failures_total': self.ping_failures_total,
+            }
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+    def _checkout(self, conn):
+        if conn is not None and time.monotonic() - self._created_at.get(id(conn), 0) > self.recycle:
+            self.recycled_total += 1
+            self._close(conn)
+            conn = None
+        if conn is not None and self.pre_ping:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self.ping_failures_total += 1
+                self._close(conn)
+                conn = None
+        if conn is None:
+            conn = self._connect()
+            self._created_at[id(conn)] = time.monotonic()
+            self.created_total += 1
+        return conn
+
+    def _close(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def parse_hosts(value):
+    # "10.0.0.2, 10.0.0.3:3307" -> [('10.0.0.2', None), ('10.0.0.3', 3307)]
+    hosts = []
+    for item in (value or '').split(','):
+        host, _, port = item.strip().partition(':')
+        if host:
+            hosts.append((host, int(port) if port else None))
+    return hosts
+
+
+class MySQL:
+    """Drop-in for flask_mysql_connector.MySQL backed by a ConnectionPool.
+
+    `mysql.connection` borrows one connection per app context and gives it
+    back to the pool when the context is torn down. With SQL_INSTRUMENTATION
+    on, its cursors are timed and counted (see instrument.py).
+
+    With MYSQL_REPLICAS set, `read_connection` borrows from one pool per
+    replica instead (same credentials, round-robin per app context).
+    """
+
+    dialect = MySQLDialect()
+
+    def __init__(self, app=None):
+        self.app = None
+        self.replica_hosts = []
+        self._pool = None
+        self._replica_pools = None
+        self._replica_cycle = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.replica_hosts = parse_hosts(app.config.get('MYSQL_REPLICAS'))
+        app.teardown_appcontext(self._teardown)
+
+    @property
+    def has_replicas(self):
+        return bool(self.replica_hosts)
+
+    @property
+    def pool(self):
+        # Created lazily and per process, so gunicorn workers never share sockets
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = self._create_pool(current_app.config)
+                    self._replica_pools = [self._create_pool(current_app.config, host, port)
+                                           for host, port in self.replica_hosts]
+                    self._replica_cycle = itertools.cycle(self._replica_pools)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    @property
+    def replica_pools(self):
+        self.pool  # created together with the primary pool
+        return self._replica_pools
+
+    def _create_pool(self, config, host=None, port=None):
+        connect_args = {k: config[v] for k, v in MYSQL_ARGS.items() if config.get(v) is not None}
+        if host is not None:
+            connect_args['host'] = host
+            if port is not None:
+                connect_args['port'] = port
+        return ConnectionPool(
+            lambda: mysql.connector.connect(**connect_args),
+            size=config.get('MYSQL_POOL_SIZE', 5),
+            max_overflow=config.get('MYSQL_POOL_MAX_OVERFLOW', 10),
+            timeout=config.get('MYSQL_POOL_TIMEOUT', 30.0),
+            recycle=config.get('MYSQL_POOL_RECYCLE', 3600),
+            pre_ping=config.get('MYSQL_POOL_PRE_PING', True),
+        )
+
+    @property
+    def connection(self):
+        conn = g.get('_mysql_conn')
+        if conn is None:
+            conn = self._wrap(self.pool.acquire())
+            g._mysql_conn = conn
+        return conn
+
+    @property
+    def read_connection(self):
+        if not self.has_replicas:
+            return self.connection
+        conn = g.get('_mysql_read_conn')
+        if conn is None:
+            self.pool  # make sure this process has its replica pools
+            with self._lock:
+                pool = next(self._replica_cycle)
+            conn = self._wrap(pool.acquire())
+            g._mysql_read_conn = conn
+            g._mysql_read_pool = pool
+        return conn
+
+    def _wrap(self, conn):
+        if current_app.config.get('SQL_INSTRUMENTATION', True):
+            conn = InstrumentedConnection(conn)
+        return conn
+
+    def pool_stats(self):
+        stats = self.pool.stats()
+        for pool in self.replica_pools:
+            for key in ('open', 'in_use', 'acquired_total', 'timeouts_total'):
+                stats[f'replica_{key}'] = stats.get(f'replica_{key}', 0) + pool.stats()[key]
+        return stats
+
+    def _teardown(self, _):
+        conn = g.pop('_mysql_conn', None)
+        if conn is not None:
+            self.pool.release(getattr(conn, 'raw', conn))
+        conn = g.pop('_mysql_read_conn', None)
+        if conn is not None:
+            g.pop('_mysql_read_pool').release(getattr(conn, 'raw', conn))
@@ -0,0 +1,82 @@
+import functools
+import operator
+
+# Compact rows for big result sets. A dictionary cursor builds one dict per row
+# (~650 bytes for a student row, keys included); a Record is a plain tuple
+# (~150 bytes) whose class maps column names to positions once per query shape.
+
+
+class Record(tuple):
+    """A row readable as row.name, row['name'] or row[0]. Read-only, and
+    otherwise a tuple: it unpacks, compares and pickles like one."""
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, name):
+        # Like a dict: "'college_name' in row"
+        return name in self._index
+
+    def get(self, name, default=None):
+        index = self._index.get(name)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        return f"Record({', '.join(f'{k}={v!r}' for k, v in zip(self._fields, self))})"
+
+    def __reduce__(self):
+        # The classes are made at runtime, so pickle rebuilds them from the fields
+        return _rebuild, (self._fields, tuple(self))
+
+
+@functools.lru_cache(maxsize=256)
+def record_type(fields):
+    # One class per column list; a later duplicate column name wins, as in a dict row
+    index = {name: i for i, name in enumerate(fields)}
+    namespace = {'__slots__': (), '_fields': fields, '_index': index}
+    for name, i in index.items():
+        # Columns win over tuple methods ("count", "index"), not over the Record API
+        if name.isidentifier() and name not in vars(Record):
+            namespace[name] = property(operator.itemgetter(i))
+    return type('Record', (Record,), namespace)
+
+
+def _rebuild(fields, values):
+    return record_type(fields)(values)
+
+
+def _row_class(cur):
+    return record_type(tuple(cur.column_names))
+
+
+def fetch_records(cur):
+    """All remaining rows of a plain (non-dictionary) cursor as Records."""
+    rows = cur.fetchall()
+    make = _row_class(cur)
+    return [make(row) for row in rows]
+
+
+def iter_records(cur, chunk_size=1000):
+    """Rows of a plain cursor as Records, fetched chunk_size at a time. With
+    an unbuffered MySQL cursor only one chunk is ever held in memory."""
+    make = _row_class(cur)
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+        for row in rows:
+            yield make(row)
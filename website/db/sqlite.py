@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+
+from flask import current_app, g
+
+from .dialect import SQLiteDialect
+from .instrument import InstrumentedConnection
+
+
+def _concat(*values):
+    # MySQL CONCAT() returns NULL if any argument is NULL
+    if any(v is None for v in values):
+        return None
+    return ''.join(str(v) for v in values)
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """Accepts the mysql.connector cursor calls the models make: %s
+    placeholders, dictionary rows and the MySQL-only syntax listed in
+    SQLiteDialect."""
+
+    def __init__(self, connection, dialect, dictionary=False):
+        self._connection = connection
+        self._dialect = dialect
+        self._cursor = connection.cursor()
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, params=()):
+        if ' FOR UPDATE' in sql and not self._connection.in_transaction:
+            # Closest thing to a row lock: take the write lock before reading
+            self._cursor.execute("BEGIN IMMEDIATE")
+        self._cursor.execute(self._dialect.translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(self._dialect.translate(sql), [tuple(p) for p in seq_params])
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+
+class SQLiteConnection:
+    def __init__(self, connection, dialect):
+        self.raw = connection
+        self.dialect = dialect
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, dictionary=False, buffered=None):
+        # SQLite always steps through results lazily, so `buffered` has no effect
+        return SQLiteCursor(self.raw, self.dialect, dictionary=dictionary)
+
+    def consume_results(self):
+        pass
+
+
+class SQLite:
+    """Embedded backend for single-node installs, tests and benchmarks.
+
+    Same interface as db.pool.MySQL. Each app context opens its own
+    connection (microseconds for a local file) in WAL mode, so readers never
+    block the writer. SQLITE_PATH=":memory:" keeps a shared in-memory
+    database alive for the life of the process.
+    """
+
+    dialect = SQLiteDialect()
+    has_replicas = False
+
+    def __init__(self, app=None):
+        self.app = None
+        self.path = None
+        self.uri = False
+        self._keeper = None
+        self._lock = threading.Lock()
+        self.opened_total = 0
+        self.open = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        path = app.config.get('SQLITE_PATH') or os.path.join(app.instance_path, 'ssis.sqlite3')
+        if path == ':memory:':
+            self.path, self.uri = f'file:ssis-{id(self)}?mode=memory&cache=shared', True
+            self._keeper = self._connect()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.path = path
+        app.teardown_appcontext(self._teardown)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, uri=self.uri, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.create_function('CONCAT', -1, _concat, deterministic=True)
+        with self._lock:
+            self.opened_total += 1
+            self.open += 1
+        return conn
+
+    @property
+    def connection(self):
+        conn = g.get('_mysql_conn')
+        if conn is None:
+            g._sqlite_conn = self._connect()
+            conn = SQLiteConnection(g._sqlite_conn, self.dialect)
+            if current_app.config.get('SQL_INSTRUMENTATION', True):
+                conn = InstrumentedConnection(conn)
+            g._mysql_conn = conn
+        return conn
+
+    @property
+    def read_connection(self):
+        return self.connection
+
+    def pool_stats(self):
+        with self._lock:
+            return {'open': self.open, 'created_total': self.opened_total}
+
+    def _teardown(self, _):
+        g.pop('_mysql_conn', None)
+        conn = g.pop('_sqlite_conn', None)
+        if conn is not None:
+            conn.close()
+            with self._lock:
+                self.open -= 1
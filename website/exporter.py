@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+import zlib
+
+from website.models.studentdb import Student
+
+ROWS_PER_CHUNK = 500
+
+
+def _chunks(rows, encode_rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= ROWS_PER_CHUNK:
+            yield encode_rows(batch)
+            batch = []
+    if batch:
+        yield encode_rows(batch)
+
+
+def _csv_rows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _jsonl_rows(rows):
+    columns = Student.ROSTER_COLUMNS
+    return ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows).encode()
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_roster(fmt, compress=False):
+    """Generator of encoded byte chunks of the full roster in 'csv' or 'jsonl'."""
+    rows = Student.iter_roster()
+    if fmt == 'csv':
+        header = _csv_rows([Student.ROSTER_COLUMNS])
+
+        def chunks():
+            yield header
+            yield from _chunks(rows, _csv_rows)
+        stream = chunks()
+    elif fmt == 'jsonl':
+        stream = _chunks(rows, _jsonl_rows)
+    else:
+        raise ValueError(f'Unsupported export format {fmt}.')
+
+    return gzip_stream(stream) if compress else stream
@@ -0,0 +1,154 @@
+import functools
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import make_response, request, session
+from werkzeug.http import http_date
+
+from website.cache import reference_cache
+from website.db import mysql
+
+
+# ---------- BACKENDS ----------
+class MemoryBackend:
+    """Per-process LRU of rendered pages."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared between workers and hosts; entries expire after `ttl` seconds.
+    Stale versions are never looked up again, so expiry only reclaims memory."""
+
+    def __init__(self, url, prefix='ssis:page:'):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError('RESPONSE_CACHE_BACKEND=redis needs the redis package.')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, entry, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(entry), ex=ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def make_backend(app):
+    backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryBackend(app.config.get('RESPONSE_CACHE_SIZE', 256))
+    if backend == 'redis':
+        return RedisBackend(app.config['RESPONSE_CACHE_URL'])
+    if backend == 'none':
+        return None
+    raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND {backend!r}')
+
+
+# ---------- RESPONSE CACHE ----------
+class ResponseCache:
+    """Caches rendered GET pages under a key built from the path, the query
+    arguments and the table_version of every table the page reads.
+
+    The key doubles as the ETag, so a client revalidating with If-None-Match
+    gets a 304 straight from the version check: no query, no template. A model
+    write bumps its table's version, which changes the key of every page that
+    depends on it; old entries are simply never asked for again.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 600
+
+    def init_app(self, app):
+        self.backend = make_backend(app)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+
+    def cached(self, *tables):
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pending flash messages are rendered once into the page: never share those
+                if (self.backend is None or request.method != 'GET' or session.get('_flashes')
+                        or mysql.pinned_to_primary()):
+                    return view(*args, **kwargs)
+
+                etag = self._key(tables)
+                if etag in request.if_none_match:
+                    entry = self.backend.get(etag)
+                    return self._not_modified(etag, entry[2] if entry else None)
+
+                entry = self.backend.get(etag)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed or session.get('_flashes'):
+                        return response
+                    entry = (response.get_data(), response.mimetype, time.time())
+                    self.backend.set(etag, entry, self.ttl)
+                else:
+                    body, mimetype, _ = entry
+                    response = make_response(body)
+                    response.mimetype = mimetype
+
+                last_modified = entry[2]
+                if request.if_modified_since and request.if_modified_since.timestamp() >= int(last_modified):
+                    return self._not_modified(etag, last_modified)
+                return self._validators(response, etag, last_modified)
+            return wrapper
+        return decorator
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    @staticmethod
+    def _key(tables):
+        versions = reference_cache.versions(*tables)
+        args = sorted(request.args.items(multi=True))
+        raw = repr((request.path, args, tables, versions)).encode()
+        return hashlib.sha1(raw).hexdigest()
+
+    @staticmethod
+    def _validators(response, etag, last_modified):
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        # Browsers may keep the page but must revalidate it every time
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def _not_modified(self, etag, last_modified):
+        return self._validators(make_response('', 304), etag, last_modified)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,82 @@
+import io
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+PHOTO_MAX_SIZE = 512  # longest edge of the stored photo, in pixels
+THUMBNAIL_SIZE = 96   # square thumbnail used by the list pages
+PHOTO_QUALITY = 82
+THUMBNAIL_QUALITY = 75
+PHOTO_MAX_PIXELS = 40_000_000  # width x height; larger uploads are rejected before decoding
+
+# Pillow's decompression bomb guard, process-wide: it warns past this many
+# pixels and raises DecompressionBombError past twice as many. Photos are the
+# only images the app opens, and _check_pixels rejects anything over it.
+Image.MAX_IMAGE_PIXELS = PHOTO_MAX_PIXELS
+
+# The warning only raises where warnings are turned into errors
+_IMAGE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, Image.DecompressionBombWarning,
+                 OSError, SyntaxError)
+
+
+class ProcessedPhoto:
+    def __init__(self, photo, thumbnail, extension):
+        self.photo = photo
+        self.thumbnail = thumbnail
+        self.extension = extension
+
+
+def _check_pixels(image):
+    # Only the header has been read: a small file can still declare a huge canvas
+    if image.width * image.height > PHOTO_MAX_PIXELS:
+        raise Image.DecompressionBombError(f'{image.width}x{image.height} is too many pixels')
+
+
+def validate_photo(data):
+    # Cheap header check done in the request so bad files fail fast
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            _check_pixels(image)
+            image.verify()
+    except _IMAGE_ERRORS as e:
+        raise ValueError('File is not a valid image.') from e
+
+
+def _encode(image, quality, extension):
+    buffer = io.BytesIO()
+    if extension == 'webp':
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+    else:
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def process_photo(data):
+    """Decode an uploaded photo, apply its EXIF rotation, drop all metadata,
+    shrink it to PHOTO_MAX_SIZE and cut a square THUMBNAIL_SIZE thumbnail.
+    Both are re-encoded as WebP (JPEG when Pillow lacks WebP support)."""
+    extension = 'webp' if features.check('webp') else 'jpg'
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            _check_pixels(source)
+            image = ImageOps.exif_transpose(source)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+    except _IMAGE_ERRORS as e:
+        raise ValueError('File is not a valid image.') from e
+
+    # Dropping info means EXIF/GPS/ICC metadata is not written back out
+    image.info = {}
+    photo = image.copy()
+    photo.thumbnail((PHOTO_MAX_SIZE, PHOTO_MAX_SIZE), Image.LANCZOS)
+    thumbnail = ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+
+    return ProcessedPhoto(
+        _encode(photo, PHOTO_QUALITY, extension),
+        _encode(thumbnail, THUMBNAIL_QUALITY, extension),
+        extension,
+    )
@@ -0,0 +1,175 @@
+import csv
+import io
+import time
+
+from website.db.errors import DuplicateKeyError
+from website.models.studentdb import Student
+
+REQUIRED_COLUMNS = ('student_id', 'first_name', 'last_name', 'gender', 'year', 'course_code')
+COLUMN_ALIASES = {'firstname': 'first_name', 'lastname': 'last_name', 'id_number': 'student_id',
+                  'course': 'course_code'}
+GENDERS = {'male': 'Male', 'female': 'Female'}
+YEARS = {1, 2, 3, 4}
+MAX_REPORTED_ERRORS = 500
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+        self.started_at = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        self.error_count += 1
+        # Keep memory bounded on a file that is wrong on every line
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+def _normalize_header(name):
+    key = (name or '').strip().lower().replace(' ', '_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def iter_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [_normalize_header(h) for h in header]
+    for line, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield line, dict(zip(columns, values))
+
+
+def iter_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('XLSX import needs the openpyxl package.')
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_normalize_header(str(h) if h is not None else '') for h in header]
+        for line, values in enumerate(rows, start=2):
+            values = ['' if v is None else str(v) for v in values]
+            if any(v.strip() for v in values):
+                yield line, dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream, filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return iter_csv(stream)
+    if extension == 'xlsx':
+        return iter_xlsx(stream)
+    raise ValueError('Unsupported file type. Allowed: csv, xlsx.')
+
+
+class StudentImporter:
+    """Streams rows from a CSV/XLSX file into the student table.
+
+    Course codes are resolved from one preloaded map, rows are validated and
+    de-duplicated in memory, and valid rows are written with one executemany
+    and one commit per chunk.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.courses = {c['course_code'].lower(): (c['id'], c['college_id'])
+                        for c in Student.get_courses()}
+        self.seen_ids = set()
+
+    def run(self, rows):
+        report = ImportReport()
+        chunk = []
+        for line, row in rows:
+            report.processed += 1
+            student = self._validate(line, row, report)
+            if student is not None:
+                chunk.append((line, student))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk, report)
+                chunk = []
+        if chunk:
+            self._flush(chunk, report)
+        return report.finish()
+
+    def _validate(self, line, row, report):
+        values = {col: (row.get(col) or '').strip() for col in REQUIRED_COLUMNS}
+        missing = [col for col, value in values.items() if not value]
+        if missing:
+            report.add_error(line, f"Missing {', '.join(missing)}.")
+            return None
+
+        student_id = values['student_id']
+        if len(student_id) > 16:
+            report.add_error(line, f"Student ID {student_id} is longer than 16 characters.")
+            return None
+        if student_id.lower() in self.seen_ids:
+            report.add_error(line, f"Student ID {student_id} appears more than once in the file.")
+            return None
+
+        gender = GENDERS.get(values['gender'].lower())
+        if gender is None:
+            report.add_error(line, f"Unknown gender {values['gender']}.")
+            return None
+
+        try:
+            year = int(float(values['year']))
+        except (ValueError, OverflowError):
+            year = None
+        if year not in YEARS:
+            report.add_error(line, f"Year must be 1 to 4, got {values['year']}.")
+            return None
+
+        course = self.courses.get(values['course_code'].lower())
+        if course is None:
+            report.add_error(line, f"Unknown course code {values['course_code']}.")
+            return None
+
+        self.seen_ids.add(student_id.lower())
+        course_id, college_id = course
+        return (student_id, values['first_name'], values['last_name'], gender, year,
+                course_id, college_id, '')
+
+    def _flush(self, chunk, report, retry=True):
+        # One lookup per chunk; MySQL compares IDs case-insensitively, so do we
+        existing = {sid.lower() for sid in Student.existing_student_ids([s[0] for _, s in chunk])}
+        pending = []
+        for line, student in chunk:
+            if student[0].lower() in existing:
+                report.add_error(line, f"Student ID {student[0]} already exists.")
+            else:
+                pending.append((line, student))
+        if not pending:
+            return
+        try:
+            Student.insert_many([student for _, student in pending])
+        except DuplicateKeyError:
+            # Someone added one of these IDs after the lookup; the chunk was
+            # rolled back, so look again and insert the rest
+            if not retry:
+                raise
+            return self._flush(pending, report, retry=False)
+        report.inserted += len(pending)
@@ -0,0 +1,189 @@
+import bisect
+import threading
+import time
+
+from flask import current_app, g, request
+
+# Seconds; request latency and per-request DB time share the same buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+# ---------- METRIC TYPES ----------
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}{_labels(self.label_names, labels)} {value}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield f'{self.name}_bucket{_labels(self.label_names, labels, [("le", bound)])} {cumulative}'
+            yield f'{self.name}_bucket{_labels(self.label_names, labels, [("le", "+Inf")])} {state[-1]}'
+            yield f'{self.name}_sum{_labels(self.label_names, labels)} {state[-2]}'
+            yield f'{self.name}_count{_labels(self.label_names, labels)} {state[-1]}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        # fn() -> iterable of (name, kind, help, value); read at scrape time
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        for collect in self.collectors:
+            for name, kind, help, value in collect():
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'ssis_http_requests_total', 'HTTP requests by endpoint, method and status.',
+    ('endpoint', 'method', 'status'))
+http_latency = registry.histogram(
+    'ssis_http_request_duration_seconds', 'Time to build the response, by endpoint.',
+    ('endpoint', 'method'))
+request_sql_queries = registry.histogram(
+    'ssis_request_sql_queries', 'SQL statements executed per request.',
+    ('endpoint',), QUERY_COUNT_BUCKETS)
+request_sql_seconds = registry.histogram(
+    'ssis_request_sql_seconds', 'Total database time per request.', ('endpoint',))
+sql_queries = registry.counter(
+    'ssis_sql_queries_total', 'Statements executed, by fingerprint.', ('fingerprint',))
+sql_seconds = registry.counter(
+    'ssis_sql_seconds_total', 'Database time spent, by fingerprint.', ('fingerprint',))
+sql_rows = registry.counter(
+    'ssis_sql_rows_total', 'Rows fetched, by fingerprint.', ('fingerprint',))
+sql_slow = registry.counter(
+    'ssis_sql_slow_queries_total', 'Statements slower than SQL_SLOW_QUERY_MS.', ('fingerprint',))
+sql_repeated = registry.counter(
+    'ssis_sql_repeated_queries_total', 'Identical statements re-run within one request.', ('endpoint',))
+
+
+@registry.collector
+def _pool_stats():
+    from website.db import mysql
+    for key, value in mysql.pool_stats().items():
+        kind = 'counter' if key.endswith('_total') else 'gauge'
+        yield f'ssis_db_pool_{key}', kind, f'Connection pool {key.replace("_", " ")}.', value
+
+
+@registry.collector
+def _suggest_index_stats():
+    from website.suggest import suggest_index
+    stats = suggest_index.stats()
+    yield 'ssis_suggest_index_bytes', 'gauge', 'Approximate memory held by the typeahead index.', stats['bytes']
+    yield 'ssis_suggest_index_keys', 'gauge', 'Keys in the typeahead index base.', stats['keys']
+    yield 'ssis_suggest_index_delta_keys', 'gauge', 'Keys written since the last rebuild.', stats['delta_keys']
+    yield 'ssis_suggest_index_build_seconds', 'gauge', 'Duration of the last rebuild.', stats['build_seconds']
+
+
+# ---------- REQUEST HOOKS ----------
+def init_app(app):
+    """Time every request and publish its SQL stats (see website.db.instrument)."""
+
+    @app.before_request
+    def _start_timer():
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        http_latency.observe(time.perf_counter() - started, endpoint, request.method)
+        http_requests.inc(1, endpoint, request.method, str(response.status_code))
+
+        stats = g.pop('_sql_stats', None)
+        if stats is not None:
+            request_sql_queries.observe(stats.count, endpoint)
+            request_sql_seconds.observe(stats.seconds, endpoint)
+            _report_repeats(stats, endpoint)
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+        return response
+
+
+def _report_repeats(stats, endpoint):
+    threshold = current_app.config.get('SQL_REPEAT_THRESHOLD', 2)
+    for (fingerprint, _), count in stats.repeats(threshold):
+        sql_repeated.inc(count - 1, endpoint)
+        current_app.logger.warning('Query ran %d times in %s with the same arguments: %s',
+                                   count, endpoint, fingerprint)
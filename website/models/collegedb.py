@@ -1,4 +1,9 @@
 from website import mysql
+from website.db.rows import fetch_records
+from website.models import counters, identity
+from website.models.studentdb import course_college_sql
+from website.models.unit_of_work import unit_of_work
+from website.search import parse_query, fulltext_term, like_prefix
 
 class College:
     __tablename__ = 'college'
@@ -9,92 +14,163 @@ class College:
         self.college_code = college_code
 
     # ---------- CRUD METHODS ----------
+    # Each runs in a unit of work (see unit_of_work.py): on its own it commits
+    # right away, inside a caller's unit it commits with everything else.
     def insert(self):
-        cur = mysql.connection.cursor()
-        cur.execute(
-            "INSERT INTO college (college_name, college_code) VALUES (%s, %s)",
-            (self.college_name, self.college_code)
-        )
-        mysql.connection.commit()
-        cur.close()
+        with unit_of_work() as uow:
+            cur = uow.execute(
+                "INSERT INTO college (college_name, college_code) VALUES (%s, %s)",
+                (self.college_name, self.college_code)
+            )
+            self.id = cur.lastrowid
+            uow.count('college', 1)
+            uow.changed('college')
+            uow.evict('college', self.id)
+            uow.evict('course')
 
     def update(self):
-        cur = mysql.connection.cursor()
-        cur.execute(
-            "UPDATE college SET college_name=%s, college_code=%s WHERE id=%s",
-            (self.college_name, self.college_code, self.id)
-        )
-        mysql.connection.commit()
-        cur.close()
+        with unit_of_work() as uow:
+            old = uow.execute("SELECT college_name FROM college WHERE id = %s FOR UPDATE", (self.id,)).fetchone()
+            uow.defer(
+                "UPDATE college SET college_name=%s, college_code=%s WHERE id=%s",
+                (self.college_name, self.college_code, self.id)
+            )
+            if old is not None and old[0] != self.college_name:
+                # The name is part of each student's course_college label
+                uow.defer(f"UPDATE student SET course_college = {course_college_sql()} WHERE college_id = %s",
+                          (self.id,))
+                uow.changed('student')
+                uow.evict('student')
+            uow.changed('college')
+            uow.evict('college', self.id)
+            uow.evict('course')
 
     def delete(self):
-        cur = mysql.connection.cursor()
-        try:
+        with unit_of_work() as uow:
             # Unlink college from students
-            cur.execute("UPDATE student SET college_id = NULL WHERE college_id = %s", (self.id,))
+            cur = uow.execute(f"""
+                UPDATE student SET college_id = NULL, course_college = {course_college_sql(college='NULL')}
+                WHERE college_id = %s
+            """, (self.id,))
+            uow.move('college', self.id, cur.rowcount)
             # Unlink college from courses
-            cur.execute("UPDATE course SET college_id = NULL WHERE college_id = %s", (self.id,))
+            uow.defer("UPDATE course SET college_id = NULL WHERE college_id = %s", (self.id,))
             # Delete the college itself
-            cur.execute("DELETE FROM college WHERE id = %s", (self.id,))
-            mysql.connection.commit()
-        except Exception:
-            mysql.connection.rollback()
-            raise
-        finally:
-            cur.close()
+            cur = uow.execute("DELETE FROM college WHERE id = %s", (self.id,))
+            uow.count('college', -cur.rowcount)
+            uow.changed('college', 'course', 'student')
+            uow.evict('college', self.id)
+            uow.evict('course')
+            uow.evict('student')
 
     # ---------- RETRIEVE METHODS ----------
     @classmethod
     def get_colleges(cls):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute(f"SELECT * FROM {cls.__tablename__} ORDER BY college_name ASC")
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def get_by_id(cls, college_id):
+        return cls.get_many_by_ids([college_id]).get(int(college_id))
+
+    @classmethod
+    def get_many_by_ids(cls, ids):
+        return identity.lookup(cls.__tablename__, ids, cls._load_by_ids)
+
+    @classmethod
+    def _load_by_ids(cls, ids):
+        if not ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(ids))
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"SELECT * FROM {cls.__tablename__} WHERE id IN ({placeholders})", tuple(ids))
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @classmethod
     def get_colleges_paginated(cls, offset, limit):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute(f"""
             SELECT * FROM {cls.__tablename__}
             ORDER BY id DESC
             LIMIT %s OFFSET %s
         """, (limit, offset))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def get_colleges_keyset(cls, limit, after=None, before=None):
+        sql = f"SELECT * FROM {cls.__tablename__}"
+        params = ()
+        if before is not None:
+            sql += " WHERE id > %s ORDER BY id ASC"
+            params = (before,)
+        elif after is not None:
+            sql += " WHERE id < %s ORDER BY id DESC"
+            params = (after,)
+        else:
+            sql += " ORDER BY id DESC"
+        sql += " LIMIT %s"
+        params += (limit,)
+
+        cur = mysql.read_connection.cursor()
+        cur.execute(sql, params)
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @classmethod
     def search_colleges(cls, query):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         search_term = f"%{query}%"
         cur.execute(f"""
             SELECT * FROM {cls.__tablename__}
             WHERE college_name LIKE %s OR college_code LIKE %s
             ORDER BY college_name ASC
         """, (search_term, search_term))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
-    # ---------- COUNT METHODS ----------
     @classmethod
-    def count_colleges(cls):
-        cur = mysql.connection.cursor()
-        cur.execute(f"SELECT COUNT(*) FROM {cls.__tablename__}")
-        count = cur.fetchone()[0]
-        cur.close()
-        return count
+    def search_colleges_ranked(cls, query):
+        terms, filters = parse_query(query)
+        terms += filters.values()
+        clauses, params, score_words = [], [], []
+        dialect = mysql.dialect
+        for term in terms:
+            expr = fulltext_term(term)
+            if expr:
+                clauses.append(dialect.match('college'))
+                params.append(dialect.fulltext_query(expr))
+                score_words.append(expr.replace('+', ''))
+            else:
+                clauses.append("(college_name LIKE %s OR college_code LIKE %s)")
+                params += [like_prefix(term)] * 2
+        if not clauses:
+            return []
 
-    # ---------- UNIQUENESS CHECK ----------
-    @classmethod
-    def is_college_unique(cls, college_name, college_code, current_college_id=None):
-        cur = mysql.connection.cursor()
+        score, score_params = "0", ()
+        if score_words:
+            score = dialect.match_score('college')
+            score_params = (dialect.fulltext_query(' '.join(score_words)),)
+
+        cur = mysql.read_connection.cursor()
         cur.execute(f"""
-            SELECT id FROM {cls.__tablename__}
-            WHERE (college_name = %s OR college_code = %s)
-            AND (id != %s OR %s IS NULL)
-        """, (college_name, college_code, current_college_id, current_college_id))
-        result = cur.fetchone()
+            SELECT *, {score} AS score FROM {cls.__tablename__}
+            WHERE {" AND ".join(clauses)}
+            ORDER BY score DESC, college_name ASC
+        """, score_params + tuple(params))
+        rows = fetch_records(cur)
         cur.close()
-        return result is None
+        return rows
+
+    # ---------- COUNT METHODS ----------
+    @classmethod
+    def count_colleges(cls):
+        return counters.get(cls.__tablename__)
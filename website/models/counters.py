@@ -0,0 +1,83 @@
+import threading
+
+from website import mysql
+
+COUNTED_TABLES = ('college', 'course', 'student')
+
+
+def adjust(cur, table, delta):
+    # Call inside the writing transaction so the count commits with the rows
+    if delta:
+        cur.execute("UPDATE row_counter SET row_count = row_count + %s WHERE table_name = %s",
+                    (delta, table))
+
+
+def get(table):
+    cur = mysql.read_connection.cursor()
+    cur.execute("SELECT row_count FROM row_counter WHERE table_name = %s", (table,))
+    row = cur.fetchone()
+    if row is None:
+        # Counter missing (e.g. migration not applied yet): fall back to a real count
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        row = cur.fetchone()
+    cur.close()
+    return max(0, row[0])
+
+
+def reconcile(tables=COUNTED_TABLES):
+    """Recompute counters from the tables. Returns {table: (old, new)}."""
+    changes = {}
+    conn = mysql.connection
+    cur = conn.cursor()
+    try:
+        for table in tables:
+            cur.execute("SELECT row_count FROM row_counter WHERE table_name = %s FOR UPDATE", (table,))
+            row = cur.fetchone()
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            actual = cur.fetchone()[0]
+            if row is None:
+                cur.execute("INSERT INTO row_counter (table_name, row_count) VALUES (%s, %s)", (table, actual))
+            elif row[0] != actual:
+                cur.execute("UPDATE row_counter SET row_count = %s WHERE table_name = %s", (actual, table))
+            changes[table] = (row[0] if row else None, actual)
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return changes
+
+
+class Reconciler:
+    """Optional in-process timer that runs reconcile() every `interval` seconds."""
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self._timer = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('COUNTER_RECONCILE_INTERVAL', 0)
+        if self.interval > 0:
+            self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.interval, self._run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run(self):
+        try:
+            with self.app.app_context():
+                for table, (old, new) in reconcile().items():
+                    if old != new:
+                        self.app.logger.warning('Row counter for %s drifted: %s -> %s', table, old, new)
+        except Exception as e:
+            self.app.logger.error('Row counter reconcile failed: %s', e)
+        finally:
+            self._schedule()
+
+
+reconciler = Reconciler()
@@ -1,4 +1,10 @@
 from website import mysql
+from website.cache import reference_cache
+from website.db.rows import fetch_records
+from website.models import counters, identity
+from website.models.studentdb import course_college_sql
+from website.models.unit_of_work import unit_of_work
+from website.search import parse_query, fulltext_term, like_prefix
 
 class Course:
     __tablename__ = 'course'
@@ -10,50 +16,66 @@ class Course:
         self.college_id = college_id
 
     # ---------- CRUD METHODS ----------
+    # Each runs in a unit of work (see unit_of_work.py)
     def insert(self):
-        cur = mysql.connection.cursor()
-        cur.execute(
-            "INSERT INTO course (course_name, course_code, college_id) VALUES (%s, %s, %s)",
-            (self.course_name, self.course_code, self.college_id)
-        )
-        mysql.connection.commit()
-        cur.close()
+        with unit_of_work() as uow:
+            cur = uow.execute(
+                "INSERT INTO course (course_name, course_code, college_id) VALUES (%s, %s, %s)",
+                (self.course_name, self.course_code, self.college_id)
+            )
+            self.id = cur.lastrowid
+            uow.count('course', 1)
+            uow.changed('course')
+            uow.evict('course', self.id)
 
     def update(self):
-        cur = mysql.connection.cursor()
-        cur.execute(
-            "UPDATE course SET course_name=%s, course_code=%s, college_id=%s WHERE id=%s",
-            (self.course_name, self.course_code, self.college_id, self.id)
-        )
-        mysql.connection.commit()
-        cur.close()
+        with unit_of_work() as uow:
+            old = uow.execute("SELECT course_code FROM course WHERE id = %s FOR UPDATE", (self.id,)).fetchone()
+            uow.defer(
+                "UPDATE course SET course_name=%s, course_code=%s, college_id=%s WHERE id=%s",
+                (self.course_name, self.course_code, self.college_id, self.id)
+            )
+            if old is not None and old[0] != self.course_code:
+                # The code is part of each student's course_college label
+                uow.defer(f"UPDATE student SET course_college = {course_college_sql()} WHERE course_id = %s",
+                          (self.id,))
+                uow.changed('student')
+                uow.evict('student')
+            uow.changed('course')
+            uow.evict('course', self.id)
 
     def delete(self):
-        cur = mysql.connection.cursor()
-        # Unlink students from this course
-        cur.execute("UPDATE student SET course_id = NULL WHERE course_id = %s", (self.id,))
-        # Delete the course
-        cur.execute("DELETE FROM course WHERE id = %s", (self.id,))
-        mysql.connection.commit()
-        cur.close()
+        with unit_of_work() as uow:
+            # Unlink students from this course
+            cur = uow.execute(f"""
+                UPDATE student SET course_id = NULL, course_college = {course_college_sql(course='NULL')}
+                WHERE course_id = %s
+            """, (self.id,))
+            uow.move('course', self.id, cur.rowcount)
+            # Delete the course
+            cur = uow.execute("DELETE FROM course WHERE id = %s", (self.id,))
+            uow.count('course', -cur.rowcount)
+            uow.changed('course', 'student')
+            uow.evict('course', self.id)
+            uow.evict('student')
 
     # ---------- RETRIEVE METHODS ----------
     @staticmethod
     def get_courses():
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute("""
             SELECT course.*, college.college_code
             FROM course
             LEFT JOIN college ON course.college_id = college.id
             ORDER BY course_name ASC
         """)
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @staticmethod
     def get_courses_paginated(offset, limit):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute("""
             SELECT course.*, college.college_code
             FROM course
@@ -61,25 +83,49 @@ class Course:
             ORDER BY course_name ASC
             LIMIT %s OFFSET %s
         """, (limit, offset))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @classmethod
     def get_courses_with_college(cls):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute(f"""
             SELECT course.*, college.college_name AS college_name, college.college_code AS college_code
             FROM {cls.__tablename__}
             LEFT JOIN college ON course.college_id = college.id
         """)
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def get_by_id(cls, course_id):
+        return cls.get_many_by_ids([course_id]).get(int(course_id))
+
+    @classmethod
+    def get_many_by_ids(cls, ids):
+        return identity.lookup(cls.__tablename__, ids, cls._load_by_ids)
+
+    @classmethod
+    def _load_by_ids(cls, ids):
+        if not ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(ids))
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT course.*, college.college_name AS college_name, college.college_code AS college_code
+            FROM {cls.__tablename__}
+            LEFT JOIN college ON course.college_id = college.id
+            WHERE course.id IN ({placeholders})
+        """, tuple(ids))
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @classmethod
     def get_courses_with_college_paginated(cls, offset, limit):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute(f"""
             SELECT course.*, college.college_name AS college_name, college.college_code AS college_code
             FROM {cls.__tablename__}
@@ -87,22 +133,52 @@ class Course:
             ORDER BY course.id DESC
             LIMIT %s OFFSET %s
         """, (limit, offset))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def get_courses_with_college_keyset(cls, limit, after=None, before=None):
+        sql = f"""
+            SELECT course.*, college.college_name AS college_name, college.college_code AS college_code
+            FROM {cls.__tablename__}
+            LEFT JOIN college ON course.college_id = college.id
+        """
+        params = ()
+        if before is not None:
+            sql += " WHERE course.id > %s ORDER BY course.id ASC"
+            params = (before,)
+        elif after is not None:
+            sql += " WHERE course.id < %s ORDER BY course.id DESC"
+            params = (after,)
+        else:
+            sql += " ORDER BY course.id DESC"
+        sql += " LIMIT %s"
+        params += (limit,)
+
+        cur = mysql.read_connection.cursor()
+        cur.execute(sql, params)
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @classmethod
     def get_colleges(cls):
-        cur = mysql.connection.cursor(dictionary=True)
+        # Dropdown data: served from the reference cache until a college changes
+        return reference_cache.get('course.colleges', ('college',), cls._load_colleges)
+
+    @staticmethod
+    def _load_colleges():
+        cur = mysql.read_connection.cursor()
         cur.execute("SELECT id, college_name FROM college")
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     # ---------- SEARCH METHODS ----------
     @classmethod
     def search_courses(cls, query):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         search_term = f"%{query}%"
         cur.execute(f"""
             SELECT course.*, college.college_code
@@ -110,14 +186,14 @@ class Course:
             LEFT JOIN college ON course.college_id = college.id
             WHERE course_name LIKE %s OR course_code LIKE %s OR college.college_code LIKE %s
         """, (search_term, search_term, search_term))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
     
     @classmethod
     def search_courses_with_college(cls, query):
         search_term = f"%{query}%"
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute("""
             SELECT course.*, college.college_code
             FROM course
@@ -127,13 +203,13 @@ class Course:
             OR college.college_code LIKE %s
             ORDER BY course.id DESC
         """, (search_term, search_term, search_term))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @staticmethod
     def search_courses_paginated(query, offset, limit):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         search_term = f"%{query}%"
         cur.execute("""
             SELECT course.*, college.college_code
@@ -143,37 +219,60 @@ class Course:
             ORDER BY course_name ASC
             LIMIT %s OFFSET %s
         """, (search_term, search_term, limit, offset))
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def search_courses_ranked(cls, query):
+        terms, filters = parse_query(query)
+        terms += filters.values()
+        clauses, params, score_words = [], [], []
+        dialect = mysql.dialect
+        for term in terms:
+            expr = fulltext_term(term)
+            if expr:
+                clauses.append(f"""(
+                    {dialect.match('course')}
+                    OR course.college_id IN (SELECT id FROM college WHERE {dialect.match('college')})
+                )""")
+                params += [dialect.fulltext_query(expr)] * 2
+                score_words.append(expr.replace('+', ''))
+            else:
+                clauses.append("""(course.course_code LIKE %s OR course.course_name LIKE %s
+                    OR course.college_id IN (SELECT id FROM college WHERE college_code LIKE %s))""")
+                params += [like_prefix(term)] * 3
+        if not clauses:
+            return []
+
+        score, score_params = "0", ()
+        if score_words:
+            score = dialect.match_score('course')
+            score_params = (dialect.fulltext_query(' '.join(score_words)),)
+
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT course.*, college.college_code, {score} AS score
+            FROM {cls.__tablename__}
+            LEFT JOIN college ON course.college_id = college.id
+            WHERE {" AND ".join(clauses)}
+            ORDER BY score DESC, course.id DESC
+        """, score_params + tuple(params))
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     # ---------- COUNT METHODS ----------
     @staticmethod
     def count_courses():
-        cur = mysql.connection.cursor()
-        cur.execute("SELECT COUNT(*) FROM course")
-        count = cur.fetchone()[0]
-        cur.close()
-        return count
+        return counters.get('course')
 
     @staticmethod
     def count_courses_search(query):
-        cur = mysql.connection.cursor()
+        cur = mysql.read_connection.cursor()
         search_term = f"%{query}%"
         cur.execute("SELECT COUNT(*) FROM course WHERE course_name LIKE %s OR course_code LIKE %s",
                     (search_term, search_term))
         count = cur.fetchone()[0]
         cur.close()
         return count
-
-    # ---------- UNIQUENESS CHECK ----------
-    @classmethod
-    def is_course_unique(cls, course_name, course_code, college_id):
-        cur = mysql.connection.cursor()
-        cur.execute(
-            "SELECT id FROM course WHERE course_name = %s AND course_code = %s AND college_id = %s",
-            (course_name, course_code, college_id)
-        )
-        result = cur.fetchone()
-        cur.close()
-        return result is None
@@ -0,0 +1,119 @@
+from collections import Counter
+
+from website import mysql
+from website.models import counters
+
+# dimension -> student column; keys are stored as strings, NULL as ''
+DIMENSIONS = {
+    'college': 'college_id',
+    'course': 'course_id',
+    'year': 'year',
+    'gender': 'gender',
+}
+STAT_COLUMNS = ', '.join(DIMENSIONS.values())
+
+
+def _keys(values):
+    # values: one student's (college_id, course_id, year, gender)
+    return [(dimension, '' if value is None else str(value))
+            for dimension, value in zip(DIMENSIONS, values)]
+
+
+def current(uow, student_pk):
+    """Stat columns of a student, row-locked until the unit of work commits."""
+    return uow.execute(f"SELECT {STAT_COLUMNS} FROM student WHERE id = %s FOR UPDATE",
+                       (student_pk,)).fetchone()
+
+
+def deltas(removed=(), added=()):
+    """Count changes for the students that left (`removed`) and joined
+    (`added`). Units of work collect these and apply() them with the commit."""
+    result = Counter()
+    for values in removed:
+        for key in _keys(values):
+            result[key] -= 1
+    for values in added:
+        for key in _keys(values):
+            result[key] += 1
+    return result
+
+
+def move_deltas(dimension, old_key, count):
+    # Students unlinked from a deleted course/college now count as ''
+    return Counter({(dimension, str(old_key)): -count, (dimension, ''): count})
+
+
+def apply(cur, changes):
+    rows = [(dimension, key, delta) for (dimension, key), delta in changes.items() if delta]
+    if rows:
+        cur.executemany("""
+            INSERT INTO enrollment_stat (dimension, dim_key, student_count)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE student_count = student_count + VALUES(student_count)
+        """, rows)
+
+
+def rebuild(dimensions=tuple(DIMENSIONS)):
+    """Recompute the stats from the student table. Returns {dimension: rows}."""
+    result = {}
+    conn = mysql.connection
+    cur = conn.cursor()
+    try:
+        for dimension in dimensions:
+            column = DIMENSIONS[dimension]
+            cur.execute("DELETE FROM enrollment_stat WHERE dimension = %s", (dimension,))
+            cur.execute(f"""
+                INSERT INTO enrollment_stat (dimension, dim_key, student_count)
+                SELECT %s, IFNULL(CAST({column} AS CHAR), ''), COUNT(*)
+                FROM student GROUP BY {column}
+            """, (dimension,))
+            result[dimension] = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return result
+
+
+def summary():
+    """Dashboard data: one primary-key range scan plus the cached course and
+    college lists for labels, independent of the number of students."""
+    cur = mysql.read_connection.cursor()
+    cur.execute("SELECT dimension, dim_key, student_count FROM enrollment_stat WHERE student_count > 0")
+    rows = cur.fetchall()
+    cur.close()
+
+    counts = {dimension: Counter() for dimension in DIMENSIONS}
+    for dimension, key, count in rows:
+        if dimension in counts:
+            counts[dimension][key] += int(count)
+    result = labelled(counts)
+    result['total'] = counters.get('student')
+    return result
+
+
+def labelled(counts):
+    """{dimension: {key: count}} -> {dimension: [{key, label, count}]} in display
+    order. Shared by the dashboard and the student list facets."""
+    from website.models.studentdb import Student
+
+    colleges = {str(c['id']): c for c in Student.get_colleges()}
+    courses = {str(c['id']): c for c in Student.get_courses()}
+    labels = {
+        'college': lambda key: colleges[key]['college_name'] if key in colleges else 'No college',
+        'course': lambda key: courses[key]['course_code'] if key in courses else 'No course',
+        'year': lambda key: f'Year {key}',
+        'gender': lambda key: key,
+    }
+
+    result = {}
+    for dimension in DIMENSIONS:
+        result[dimension] = [{'key': key, 'label': labels[dimension](key), 'count': count}
+                             for key, count in counts.get(dimension, {}).items() if count > 0]
+    for dimension in ('college', 'course'):
+        result[dimension].sort(key=lambda item: (-item['count'], item['label']))
+    result['year'].sort(key=lambda item: int(item['key']) if item['key'].isdigit() else 0)
+    result['gender'].sort(key=lambda item: item['label'])
+    return result
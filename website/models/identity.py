@@ -0,0 +1,37 @@
+from flask import g, has_app_context
+
+# Per-request identity map: a row fetched by primary key is loaded at most once
+# per request. Lives on flask.g, so it is dropped with the app context.
+
+
+def _rows(table):
+    if not has_app_context():
+        return None
+    tables = g.setdefault('_identity_map', {})
+    return tables.setdefault(table, {})
+
+
+def lookup(table, ids, loader):
+    # Returns {id: row} for the requested ids; loader(missing_ids) must return
+    # the rows that exist, each with an 'id' key. Misses are remembered as None.
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    rows = _rows(table)
+    if rows is None:
+        return {row['id']: row for row in loader(ids)}
+
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        loaded = {row['id']: row for row in loader(missing)}
+        for i in missing:
+            rows[i] = loaded.get(i)
+    return {i: rows[i] for i in ids if rows[i] is not None}
+
+
+def evict(table, id=None):
+    rows = _rows(table)
+    if rows is None:
+        return
+    if id is None:
+        rows.clear()
+    else:
+        rows.pop(int(id), None)
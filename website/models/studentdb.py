@@ -1,10 +1,31 @@
+import bisect
+from collections import Counter
+
 from website import mysql
+from website.cache import reference_cache
+from website.db.rows import fetch_records, iter_records
+from website.models import counters, enrollment, identity
+from website.models.unit_of_work import unit_of_work
+from website.search import parse_query, fulltext_term, like_prefix
+from website.suggest import suggest_index
+from website.uploads import PHOTO_NONE
+
+
+def course_college_sql(course='student.course_id', college='student.college_id'):
+    # student.course_college, the "<course code> (<college name>)" label on the
+    # list and search pages, stored so those read the student table alone.
+    # Every write that moves a student or renames/deletes a course or college
+    # sets it with this expression; pass '%s' or 'NULL' for the new ids.
+    return (f"CONCAT(IFNULL((SELECT course_code FROM course WHERE course.id = {course}), ''), ' (', "
+            f"IFNULL((SELECT college_name FROM college WHERE college.id = {college}), ''), ')')")
+
 
 class Student:
     __tablename__ = 'student'
 
     def __init__(self, id=None, student_id=None, first_name=None, last_name=None,
-                 gender=None, year=None, course_id=None, college_id=None, cloudinary_url=None):
+                 gender=None, year=None, course_id=None, college_id=None, cloudinary_url=None,
+                 photo_status=None, photo_token=None):
         self.id = id
         self.student_id = student_id
         self.first_name = first_name
@@ -14,59 +35,233 @@ class Student:
         self.course_id = course_id
         self.college_id = college_id
         self.cloudinary_url = cloudinary_url
+        self.photo_status = photo_status
+        self.photo_token = photo_token
 
     # ---------- CRUD METHODS ----------
+    # Each runs in a unit of work (see unit_of_work.py): on its own it commits
+    # right away, inside a caller's unit it commits with everything else.
     def insert(self):
-        cur = mysql.connection.cursor()
-        cur.execute(f"""
-            INSERT INTO {self.__tablename__} 
-            (student_id, first_name, last_name, gender, year, course_id, college_id, cloudinary_url)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (self.student_id, self.first_name, self.last_name, self.gender, 
-              self.year, self.course_id, self.college_id, self.cloudinary_url))
-        mysql.connection.commit()
-        cur.close()
+        with unit_of_work() as uow:
+            cur = uow.execute(f"""
+                INSERT INTO {self.__tablename__} 
+                (student_id, first_name, last_name, gender, year, course_id, college_id, cloudinary_url, photo_status,
+                 photo_token, course_college)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, {course_college_sql('%s', '%s')})
+            """, (self.student_id, self.first_name, self.last_name, self.gender, 
+                  self.year, self.course_id, self.college_id, self.cloudinary_url,
+                  self.photo_status or PHOTO_NONE, self.photo_token, self.course_id, self.college_id))
+            self.id = cur.lastrowid
+            uow.count(self.__tablename__, 1)
+            uow.record(added=[self._stat_values()])
+            uow.changed(self.__tablename__)
+            uow.after_commit(suggest_index.add, self.id, self.student_id, self.first_name, self.last_name)
+
+    @classmethod
+    def insert_many(cls, rows):
+        # rows: (student_id, first_name, last_name, gender, year, course_id, college_id, cloudinary_url)
+        with unit_of_work() as uow:
+            sql = f"""
+                INSERT INTO {cls.__tablename__}
+                (student_id, first_name, last_name, gender, year, course_id, college_id, cloudinary_url,
+                 course_college)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, {course_college_sql('%s', '%s')})
+            """
+            for row in rows:
+                uow.defer(sql, tuple(row) + (row[5], row[6]))
+            uow.count(cls.__tablename__, len(rows))
+            uow.record(added=[(r[6], r[5], r[4], r[3]) for r in rows])
+            uow.changed(cls.__tablename__)
+            uow.after_commit(suggest_index.invalidate)
 
     def update(self):
-        cur = mysql.connection.cursor()
-        cur.execute(f"""
-            UPDATE {self.__tablename__} SET 
-                student_id=%s, first_name=%s, last_name=%s, gender=%s, year=%s, 
-                course_id=%s, college_id=%s, cloudinary_url=%s
-            WHERE id=%s
-        """, (self.student_id, self.first_name, self.last_name, self.gender,
-              self.year, self.course_id, self.college_id, self.cloudinary_url, self.id))
-        mysql.connection.commit()
-        cur.close()
+        # Photo columns are left alone when None so an edit can't overwrite
+        # the result of a background upload that finished in the meantime
+        with unit_of_work() as uow:
+            old = enrollment.current(uow, self.id)
+            uow.defer(f"""
+                UPDATE {self.__tablename__} SET 
+                    student_id=%s, first_name=%s, last_name=%s, gender=%s, year=%s, 
+                    course_id=%s, college_id=%s, course_college={course_college_sql('%s', '%s')},
+                    cloudinary_url=COALESCE(%s, cloudinary_url), photo_status=COALESCE(%s, photo_status),
+                    photo_token=COALESCE(%s, photo_token)
+                WHERE id=%s
+            """, (self.student_id, self.first_name, self.last_name, self.gender,
+                  self.year, self.course_id, self.college_id, self.course_id, self.college_id,
+                  self.cloudinary_url, self.photo_status, self.photo_token, self.id))
+            if old is not None:
+                uow.record(removed=[old], added=[self._stat_values()])
+            uow.changed(self.__tablename__)
+            uow.evict(self.__tablename__, self.id)
+            uow.after_commit(suggest_index.add, self.id, self.student_id, self.first_name, self.last_name)
+
+    @classmethod
+    def set_photo(cls, id, cloudinary_url, photo_status, thumbnail_url=None, token=None):
+        # With a token, only while it is still the student's photo_token: a
+        # newer photo submitted in the meantime wins over this result
+        where, params = "WHERE id=%s", (id,)
+        if token is not None:
+            where, params = "WHERE id=%s AND photo_token=%s", (id, token)
+        with unit_of_work() as uow:
+            if cloudinary_url is None:
+                # Failed upload: keep whatever photo the student already had
+                uow.defer(f"UPDATE {cls.__tablename__} SET photo_status=%s {where}", (photo_status,) + params)
+            else:
+                uow.defer(f"""
+                    UPDATE {cls.__tablename__}
+                    SET cloudinary_url=%s, thumbnail_url=%s, photo_status=%s
+                    {where}
+                """, (cloudinary_url, thumbnail_url, photo_status) + params)
+            uow.changed(cls.__tablename__)
+            uow.evict(cls.__tablename__, id)
 
     def delete(self):
+        with unit_of_work() as uow:
+            old = enrollment.current(uow, self.id)
+            if old is None:
+                return
+            # The row is locked above, so this deletes exactly one
+            uow.defer(f"DELETE FROM {self.__tablename__} WHERE id=%s", (self.id,))
+            uow.count(self.__tablename__, -1)
+            uow.record(removed=[old])
+            uow.changed(self.__tablename__)
+            uow.evict(self.__tablename__, self.id)
+            uow.after_commit(suggest_index.remove, self.id)
+
+    def _stat_values(self):
+        # Same order as enrollment.STAT_COLUMNS; form values arrive as strings
+        return (self.college_id, self.course_id, self.year, self.gender)
+
+    # ---------- BULK METHODS ----------
+    # Students are picked by primary key (`ids`), by a search query in the
+    # search box syntax (`query`, e.g. "year:3 course:BSCS") or both; with
+    # neither, every student. Each chunk is locked, changed and committed in
+    # its own short unit of work, so no lock is held for the whole run.
+    # progress(done, total) is called after every commit.
+    @classmethod
+    def delete_many(cls, ids=None, query=None, chunk_size=500, progress=None):
+        def apply(uow, rows, placeholders, row_ids):
+            cur = uow.execute(f"DELETE FROM {cls.__tablename__} WHERE id IN ({placeholders})", row_ids)
+            uow.count(cls.__tablename__, -cur.rowcount)
+            uow.record(removed=[row[1:] for row in rows])
+        return cls._bulk(apply, ids, query, chunk_size=chunk_size, progress=progress,
+                         on_commit=suggest_index.remove)
+
+    @classmethod
+    def set_course(cls, course_id, ids=None, query=None, chunk_size=500, progress=None):
+        # The college follows the course, as it does when a student is edited
+        course = next((c for c in cls.get_courses() if c['id'] == int(course_id)), None)
+        if course is None:
+            raise ValueError('Course not found.')
+        course_id, college_id = course['id'], course['college_id']
+
+        def apply(uow, rows, placeholders, row_ids):
+            uow.defer(f"""
+                UPDATE {cls.__tablename__}
+                SET course_id=%s, college_id=%s, course_college={course_college_sql('%s', '%s')}
+                WHERE id IN ({placeholders})
+            """, (course_id, college_id, course_id, college_id) + row_ids)
+            uow.record(removed=[row[1:] for row in rows],
+                       added=[(college_id, course_id, year, gender) for _, _, _, year, gender in rows])
+        return cls._bulk(apply, ids, query, chunk_size=chunk_size, progress=progress)
+
+    @classmethod
+    def promote(cls, ids=None, query=None, by=1, chunk_size=500, progress=None):
+        # Students who would leave years 1-4 are left where they are
+        def apply(uow, rows, placeholders, row_ids):
+            uow.defer(f"UPDATE {cls.__tablename__} SET year = year + %s WHERE id IN ({placeholders})",
+                      (by,) + row_ids)
+            uow.record(removed=[row[1:] for row in rows],
+                       added=[(college_id, course_id, year + by, gender)
+                              for _, college_id, course_id, year, gender in rows])
+        return cls._bulk(apply, ids, query, condition=("student.year + %s BETWEEN 1 AND 4", (by,)),
+                         chunk_size=chunk_size, progress=progress)
+
+    @classmethod
+    def _bulk(cls, apply, ids, query, condition=None, chunk_size=500, progress=None, on_commit=None):
+        # Walks the matching students in id order. apply(uow, rows, placeholders, ids)
+        # gets each chunk's rows as (id, college_id, course_id, year, gender),
+        # already locked; on_commit(*ids) runs once they are committed.
+        # Returns how many students were changed.
+        clauses, params = [], ()
+        if query is not None:
+            clause = cls._ranked_search_clause(query)
+            if clause is None:
+                raise ValueError('Search query is empty.')
+            clauses.append(clause[0][len('WHERE '):])
+            params += clause[1]
+        if condition is not None:
+            clauses.append(condition[0])
+            params += condition[1]
+        if ids is not None:
+            ids = sorted({int(i) for i in ids})
+            total = len(ids)
+        elif clauses:
+            total = cls._bulk_count(clauses, params)
+        else:
+            total = counters.get(cls.__tablename__)
+
+        done, last_id = 0, 0
+        while True:
+            if ids is not None:
+                start = bisect.bisect_right(ids, last_id)
+                chunk_ids = ids[start:start + chunk_size]
+                if not chunk_ids:
+                    break
+                chunk_clauses = clauses + [f"id IN ({', '.join(['%s'] * len(chunk_ids))})"]
+                chunk_params = params + tuple(chunk_ids)
+            else:
+                chunk_clauses, chunk_params = clauses + ["id > %s"], params + (last_id,)
+
+            with unit_of_work() as uow:
+                rows = uow.execute(f"""
+                    SELECT id, {enrollment.STAT_COLUMNS} FROM {cls.__tablename__}
+                    WHERE {' AND '.join(chunk_clauses)}
+                    ORDER BY id LIMIT %s FOR UPDATE
+                """, chunk_params + (chunk_size,)).fetchall()
+                if rows:
+                    row_ids = tuple(row[0] for row in rows)
+                    apply(uow, rows, ', '.join(['%s'] * len(row_ids)), row_ids)
+                    uow.changed(cls.__tablename__)
+                    uow.evict(cls.__tablename__)
+                    if on_commit is not None:
+                        uow.after_commit(on_commit, *row_ids)
+
+            if rows:
+                done += len(rows)
+                if progress is not None:
+                    progress(done, total)
+            if ids is not None:
+                last_id = chunk_ids[-1]
+            elif len(rows) < chunk_size:
+                break
+            else:
+                last_id = rows[-1][0]
+        return done
+
+    @classmethod
+    def _bulk_count(cls, clauses, params):
+        # Total for progress reports; rows can change before their chunk is reached
         cur = mysql.connection.cursor()
-        cur.execute(f"DELETE FROM {self.__tablename__} WHERE id=%s", (self.id,))
-        mysql.connection.commit()
+        cur.execute(f"SELECT COUNT(*) FROM {cls.__tablename__} WHERE {' AND '.join(clauses)}", params)
+        total = cur.fetchone()[0]
         cur.close()
+        return total
 
     # ---------- RETRIEVE METHODS ----------
     @classmethod
     def get_students(cls):
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute(f"SELECT * FROM {cls.__tablename__} ORDER BY id DESC")
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
     @classmethod
     def get_students_with_courses(cls, limit=None, offset=None):
         sql = f"""
-            SELECT student.*, 
-                CONCAT(
-                    IFNULL(course.course_code, ''), 
-                    ' (', 
-                    IFNULL(college.college_name, ''), 
-                    ')'
-                ) AS course_college
+            SELECT student.*
             FROM student
-            LEFT JOIN course ON student.course_id = course.id
-            LEFT JOIN college ON student.college_id = college.id
             ORDER BY student.id DESC
         """
         params = ()
@@ -74,103 +269,414 @@ class Student:
             sql += " LIMIT %s OFFSET %s"
             params = (limit, offset)
 
-        cur = mysql.connection.cursor(dictionary=True)
+        cur = mysql.read_connection.cursor()
         cur.execute(sql, params)
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
-    # ---------- COUNT METHODS ----------
     @classmethod
-    def count_students(cls):
-        cur = mysql.connection.cursor()
-        cur.execute(f"SELECT COUNT(*) FROM {cls.__tablename__}")
-        count = cur.fetchone()[0]
+    def get_students_with_courses_keyset(cls, limit, after=None, before=None):
+        # Seek pagination on the primary key: cost no longer grows with page depth
+        sql = """
+            SELECT student.*
+            FROM student
+        """
+        params = ()
+        if before is not None:
+            sql += " WHERE student.id > %s ORDER BY student.id ASC"
+            params = (before,)
+        elif after is not None:
+            sql += " WHERE student.id < %s ORDER BY student.id DESC"
+            params = (after,)
+        else:
+            sql += " ORDER BY student.id DESC"
+        sql += " LIMIT %s"
+        params += (limit,)
+
+        cur = mysql.read_connection.cursor()
+        cur.execute(sql, params)
+        rows = fetch_records(cur)
         cur.close()
-        return count
+        return rows
+
+    # ---------- FACETED LIST ----------
+    # sort key -> ORDER BY. Each one ends on an indexed column so MySQL reads
+    # the pages in index order: (last_name, first_name), (year), student_id and
+    # the primary key, with id appended by InnoDB as the tiebreaker.
+    SORTS = {
+        'newest': "student.id DESC",
+        'oldest': "student.id ASC",
+        'name': "student.last_name ASC, student.first_name ASC, student.id ASC",
+        '-name': "student.last_name DESC, student.first_name DESC, student.id DESC",
+        'student_id': "student.student_id ASC",
+        '-student_id': "student.student_id DESC",
+        'year': "student.year ASC, student.id ASC",
+        '-year': "student.year DESC, student.id DESC",
+    }
+    DEFAULT_SORT = 'newest'
+
+    @staticmethod
+    def _filter_where(filters):
+        # filters: {facet: key} with facets from enrollment.DIMENSIONS
+        clauses, params = [], ()
+        for facet, key in filters.items():
+            clauses.append(f"student.{enrollment.DIMENSIONS[facet]} = %s")
+            params += (key,)
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
 
-    # ---------- SEARCH ----------
     @classmethod
-    def search_students(cls, query):
-        search_term = f"%{query}%"
-        cur = mysql.connection.cursor(dictionary=True)
+    def get_students_filtered(cls, filters, sort, offset, limit):
+        where, params = cls._filter_where(filters)
+        cur = mysql.read_connection.cursor()
         cur.execute(f"""
-            SELECT student.*, 
-                CONCAT(
-                    IFNULL(course.course_code, ''), 
-                    ' (', 
-                    IFNULL(college.college_name, ''), 
-                    ')'
-                ) AS course_college
+            SELECT student.*
             FROM student
-            LEFT JOIN course ON student.course_id = course.id
-            LEFT JOIN college ON student.college_id = college.id
+            {where}
+            ORDER BY {cls.SORTS.get(sort, cls.SORTS[cls.DEFAULT_SORT])}
+            LIMIT %s OFFSET %s
+        """, params + (limit, offset))
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def facet_counts(cls, filters):
+        """Counts per college, course, year and gender for the list page, plus
+        the total matching all filters. Each facet's counts apply the other
+        facets' filters but not its own, so every option shows how many
+        students picking it would give.
+
+        Without filters that is exactly what enrollment_stat and row_counter
+        keep. With filters it comes from one grouped query over the facet
+        index, cached until a student changes; a request pinned to the primary
+        skips that cache and counts only the students the filters leave."""
+        if not filters:
+            return enrollment.summary()
+        if mysql.pinned_to_primary():
+            return cls._filtered_facets(filters)
+
+        counts = {facet: Counter() for facet in enrollment.DIMENSIONS}
+        total = 0
+        for *values, count in reference_cache.get('student.facets', ('student',), cls._load_facets):
+            keys = dict(zip(enrollment.DIMENSIONS, ('' if v is None else str(v) for v in values)))
+            missed = [facet for facet, key in filters.items() if keys[facet] != key]
+            if not missed:
+                total += count
+            for facet in enrollment.DIMENSIONS:
+                if not missed or missed == [facet]:
+                    counts[facet][keys[facet]] += count
+        result = enrollment.labelled(counts)
+        result['total'] = total
+        return result
+
+    @classmethod
+    def _filtered_facets(cls, filters):
+        # One small grouped query per facet, narrowed by the other facets' filters
+        counts = {facet: Counter() for facet in enrollment.DIMENSIONS}
+        cur = mysql.read_connection.cursor()
+        for facet, column in enrollment.DIMENSIONS.items():
+            others = {f: key for f, key in filters.items() if f != facet}
+            if others:
+                where, params = cls._filter_where(others)
+                cur.execute(f"SELECT {column}, COUNT(*) FROM student {where} GROUP BY {column}", params)
+            else:
+                # Only this facet is filtered: its counts are the maintained ones
+                cur.execute("SELECT dim_key, student_count FROM enrollment_stat WHERE dimension = %s",
+                            (facet,))
+            for key, count in cur.fetchall():
+                counts[facet]['' if key is None else str(key)] += int(count)
+        where, params = cls._filter_where(filters)
+        cur.execute(f"SELECT COUNT(*) FROM student {where}", params)
+        total = cur.fetchone()[0]
+        cur.close()
+        result = enrollment.labelled(counts)
+        result['total'] = total
+        return result
+
+    @staticmethod
+    def _load_facets():
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT {enrollment.STAT_COLUMNS}, COUNT(*) FROM student
+            GROUP BY {enrollment.STAT_COLUMNS}
+        """)
+        rows = [tuple(row[:-1]) + (int(row[-1]),) for row in cur.fetchall()]
+        cur.close()
+        return rows
+
+    @classmethod
+    def existing_student_ids(cls, student_ids):
+        if not student_ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        cur = mysql.connection.cursor()
+        cur.execute(f"SELECT student_id FROM {cls.__tablename__} WHERE student_id IN ({placeholders})",
+                    tuple(student_ids))
+        found = {row[0] for row in cur.fetchall()}
+        cur.close()
+        return found
+
+    ROSTER_COLUMNS = ('student_id', 'first_name', 'last_name', 'gender', 'year',
+                      'course_code', 'course_name', 'college_code', 'college_name', 'cloudinary_url')
+
+    @classmethod
+    def iter_roster(cls, chunk_size=1000):
+        # Unbuffered cursor: MySQL streams rows as we read them, so memory stays
+        # flat no matter how many students there are. Yields Records in ROSTER_COLUMNS order.
+        cur = mysql.read_connection.cursor(buffered=False)
+        done = False
+        try:
+            cur.execute("""
+                SELECT student.student_id, student.first_name, student.last_name, student.gender,
+                    student.year, course.course_code, course.course_name,
+                    college.college_code, college.college_name, student.cloudinary_url
+                FROM student
+                LEFT JOIN course ON student.course_id = course.id
+                LEFT JOIN college ON student.college_id = college.id
+                ORDER BY student.id
+            """)
+            yield from iter_records(cur, chunk_size)
+            done = True
+        finally:
+            if not done:
+                # Consumer stopped early; drain the result so the connection stays usable
+                mysql.read_connection.consume_results()
+            cur.close()
+
+    # ---------- COUNT METHODS ----------
+    @classmethod
+    def count_students(cls):
+        # Maintained counter: a primary-key read instead of a COUNT(*) scan
+        return counters.get(cls.__tablename__)
+
+    # ---------- SEARCH ----------
+    _SEARCH_WHERE = """
             WHERE student.student_id LIKE %s
             OR student.first_name LIKE %s
             OR student.last_name LIKE %s
             OR student.gender LIKE %s
             OR student.year LIKE %s
-            OR course.course_code LIKE %s
-            OR college.college_name LIKE %s
+            OR student.course_college LIKE %s
+    """
+
+    @classmethod
+    def search_students(cls, query):
+        search_term = f"%{query}%"
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT student.*
+            FROM student
+            {cls._SEARCH_WHERE}
             ORDER BY student.id DESC
-        """, (search_term, search_term, search_term, search_term, search_term,
-            search_term, search_term))
-        rows = cur.fetchall()
+        """, (search_term,) * 6)
+        rows = fetch_records(cur)
         cur.close()
         return rows
 
-    # ---------- UNIQUENESS CHECK ----------
     @classmethod
-    def is_student_unique(cls, student_id, first_name, last_name, gender, year, course_id, college_id, current_student_id=None):
-        cur = mysql.connection.cursor()
-        sql = f"""
+    def search_students_paginated(cls, query, offset, limit):
+        # Only one page of rows leaves the database
+        search_term = f"%{query}%"
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT student.*
+            FROM student
+            {cls._SEARCH_WHERE}
+            ORDER BY student.id DESC
+            LIMIT %s OFFSET %s
+        """, (search_term,) * 6 + (limit, offset))
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def count_students_search(cls, query):
+        search_term = f"%{query}%"
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT COUNT(*)
+            FROM student
+            {cls._SEARCH_WHERE}
+        """, (search_term,) * 6)
+        count = cur.fetchone()[0]
+        cur.close()
+        return count
+
+    @classmethod
+    def suggest_ids(cls, prefix, limit):
+        # SQL fallback for the typeahead while the suggest index is being built
+        pattern = like_prefix(prefix.strip())
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
             SELECT id FROM {cls.__tablename__}
-            WHERE student_id=%s AND first_name=%s AND last_name=%s 
-              AND gender=%s AND year=%s AND course_id=%s AND college_id=%s
-        """
-        params = (student_id, first_name, last_name, gender, year, course_id, college_id)
+            WHERE student_id LIKE %s OR last_name LIKE %s OR first_name LIKE %s
+            ORDER BY last_name, first_name LIMIT %s
+        """, (pattern, pattern, pattern, limit))
+        ids = [row[0] for row in cur.fetchall()]
+        cur.close()
+        return ids
+
+    # ---------- RANKED SEARCH (FULLTEXT) ----------
+    @classmethod
+    def _ranked_search_clause(cls, query):
+        # Builds the WHERE clause and relevance expression for a parsed query.
+        # Every predicate hits an index: FULLTEXT for words, B-tree prefixes for
+        # short terms/IDs, and course/college are resolved through their own indexes.
+        terms, filters = parse_query(query)
+        clauses, params, score_words = [], [], []
+        dialect = mysql.dialect
 
-        if current_student_id:
-            sql += " AND id != %s"
-            params += (current_student_id,)
+        for term in terms:
+            expr = fulltext_term(term)
+            if expr:
+                clauses.append(f"""(
+                    {dialect.match('student')}
+                    OR student.course_id IN (SELECT id FROM course WHERE {dialect.match('course')})
+                    OR student.college_id IN (SELECT id FROM college WHERE {dialect.match('college')})
+                )""")
+                params += [dialect.fulltext_query(expr)] * 3
+                score_words.append(expr.replace('+', ''))
+            else:
+                prefix = like_prefix(term)
+                clause = """(
+                    student.student_id LIKE %s OR student.first_name LIKE %s OR student.last_name LIKE %s
+                    OR student.course_id IN (SELECT id FROM course WHERE course_code LIKE %s)
+                    OR student.college_id IN (SELECT id FROM college WHERE college_code LIKE %s)"""
+                params += [prefix] * 5
+                if term.isdigit():
+                    clause += " OR student.year = %s"
+                    params.append(term)
+                clauses.append(clause + ")")
 
-        cur.execute(sql, params)
-        result = cur.fetchone()
+        if 'id' in filters:
+            clauses.append("student.student_id LIKE %s")
+            params.append(like_prefix(filters['id']))
+        if 'first' in filters:
+            clauses.append("student.first_name LIKE %s")
+            params.append(like_prefix(filters['first']))
+        if 'last' in filters:
+            clauses.append("student.last_name LIKE %s")
+            params.append(like_prefix(filters['last']))
+        if 'name' in filters:
+            clauses.append("(student.first_name LIKE %s OR student.last_name LIKE %s)")
+            params += [like_prefix(filters['name'])] * 2
+        if 'gender' in filters:
+            clauses.append("student.gender = %s")
+            params.append(filters['gender'])
+        if 'year' in filters:
+            clauses.append("student.year = %s")
+            params.append(filters['year'])
+        if 'course' in filters:
+            clauses.append("student.course_id IN (SELECT id FROM course WHERE course_code = %s OR course_name = %s)")
+            params += [filters['course']] * 2
+        if 'college' in filters:
+            clauses.append("student.college_id IN (SELECT id FROM college WHERE college_code = %s OR college_name = %s)")
+            params += [filters['college']] * 2
+
+        if not clauses:
+            return None
+
+        if score_words:
+            score = dialect.match_score('student')
+            score_params = (dialect.fulltext_query(' '.join(score_words)),)
+        else:
+            score, score_params = "0", ()
+
+        return "WHERE " + " AND ".join(clauses), tuple(params), score, score_params
+
+    @classmethod
+    def search_students_ranked(cls, query, offset, limit):
+        clause = cls._ranked_search_clause(query)
+        if clause is None:
+            return []
+        where, params, score, score_params = clause
+
+        cur = mysql.read_connection.cursor()
+        cur.execute(f"""
+            SELECT student.*,
+                {score} AS score
+            FROM student
+            {where}
+            ORDER BY score DESC, student.id DESC
+            LIMIT %s OFFSET %s
+        """, score_params + params + (limit, offset))
+        rows = fetch_records(cur)
+        cur.close()
+        return rows
+
+    @classmethod
+    def count_students_ranked(cls, query, limit=None):
+        # With a limit, counting stops at limit + 1 matches; a result above
+        # `limit` means "at least that many" and the caller shows it as approximate
+        clause = cls._ranked_search_clause(query)
+        if clause is None:
+            return 0
+        where, params, _, _ = clause
+
+        cur = mysql.read_connection.cursor()
+        if limit is None:
+            cur.execute(f"SELECT COUNT(*) FROM {cls.__tablename__} {where}", params)
+        else:
+            cur.execute(f"""
+                SELECT COUNT(*) FROM (SELECT 1 FROM {cls.__tablename__} {where} LIMIT %s) AS capped
+            """, params + (limit + 1,))
+        count = cur.fetchone()[0]
         cur.close()
-        return result is None
+        return count
 
     # ---------- HELPER ----------
+    @classmethod
+    def get_courses(cls):
+        # Dropdown data: served from the reference cache until a course or college changes
+        return reference_cache.get('student.courses', ('course', 'college'), cls._load_courses)
+
     @staticmethod
-    def get_courses():
-        cur = mysql.connection.cursor(dictionary=True)
+    def _load_courses():
+        cur = mysql.read_connection.cursor()
         cur.execute("""
             SELECT course.id, course.course_code, course.college_id, college.college_name
             FROM course
             LEFT JOIN college ON course.college_id = college.id
             ORDER BY course.course_code ASC
         """)
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
-    
+
+    @classmethod
+    def get_colleges(cls):
+        return reference_cache.get('student.colleges', ('college',), cls._load_colleges)
+
     @staticmethod
-    def get_colleges():
-        cur = mysql.connection.cursor(dictionary=True)
+    def _load_colleges():
+        cur = mysql.read_connection.cursor()
         cur.execute("SELECT id, college_name FROM college ORDER BY college_name ASC")
-        rows = cur.fetchall()
+        rows = fetch_records(cur)
         cur.close()
         return rows
     
+    @classmethod
+    def get_student_by_id(cls, student_id):
+        return cls.get_many_by_ids([student_id]).get(int(student_id))
+
+    @classmethod
+    def get_many_by_ids(cls, ids):
+        return identity.lookup(cls.__tablename__, ids, cls._load_by_ids)
+
     @staticmethod
-    def get_student_by_id(student_id):
-        cur = mysql.connection.cursor(dictionary=True)
-        query = """
+    def _load_by_ids(ids):
+        if not ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(ids))
+        cur = mysql.read_connection.cursor()
+        query = f"""
             SELECT s.id, s.student_id, s.first_name, s.last_name, s.gender, s.year,
-                s.course_id, s.college_id, s.cloudinary_url
+                s.course_id, s.college_id, s.cloudinary_url, s.thumbnail_url, s.photo_status
             FROM student s
-            WHERE s.id = %s
+            WHERE s.id IN ({placeholders})
         """
-        cur.execute(query, (student_id,))
-        student = cur.fetchone()
+        cur.execute(query, tuple(ids))
+        rows = fetch_records(cur)
         cur.close()
-        return student
+        return rows
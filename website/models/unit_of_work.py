@@ -0,0 +1,157 @@
+import contextlib
+from collections import Counter
+
+from flask import g
+
+from website import mysql
+from website.cache import bump_versions, reference_cache
+from website.db.errors import raise_if_duplicate
+from website.models import counters, enrollment, identity
+
+
+class UnitOfWork:
+    """One transaction on the request's connection, built up by model methods
+    and committed once.
+
+    Statements whose results nobody reads go through defer(): they are held
+    back and consecutive ones with the same SQL are sent as one executemany()
+    batch. execute() sends everything deferred first, so statements still
+    reach the server in order. Row counter and enrollment deltas, table
+    version bumps, cache evictions and after_commit() callbacks are
+    collected along the way and applied once: the bookkeeping statements
+    just before COMMIT, the rest after it.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self._pending = []             # [(sql, [params, ...])]
+        self._counts = Counter()       # table -> row count delta
+        self._enrollment = Counter()   # (dimension, key) -> student count delta
+        self._tables = set()           # version bumped, reference cache dropped
+        self._evictions = []           # identity map (table, id)
+        self._callbacks = []
+        self._savepoints = 0
+
+    # ---------- STATEMENTS ----------
+    def execute(self, sql, params=()):
+        # Runs now; the cursor holds the rows, rowcount and lastrowid
+        self.flush()
+        self._run(self.cursor.execute, sql, params)
+        return self.cursor
+
+    def defer(self, sql, params=()):
+        if self._pending and self._pending[-1][0] == sql:
+            self._pending[-1][1].append(params)
+        else:
+            self._pending.append((sql, [params]))
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        for sql, batch in pending:
+            if len(batch) == 1:
+                self._run(self.cursor.execute, sql, batch[0])
+            else:
+                self._run(self.cursor.executemany, sql, batch)
+
+    def _run(self, method, sql, params):
+        try:
+            method(sql, params)
+        except Exception as e:
+            raise_if_duplicate(e, mysql.dialect)
+            raise
+
+    # ---------- BOOKKEEPING ----------
+    def count(self, table, delta):
+        self._counts[table] += delta
+
+    def record(self, removed=(), added=()):
+        self._enrollment.update(enrollment.deltas(removed, added))
+
+    def move(self, dimension, old_key, count):
+        self._enrollment.update(enrollment.move_deltas(dimension, old_key, count))
+
+    def changed(self, *tables):
+        # Bumps the tables' versions with the commit and drops what the caches hold of them
+        self._tables.update(tables)
+
+    def evict(self, table, id=None):
+        # Now, so later reads in this unit reload the row, and again once it is over
+        identity.evict(table, id)
+        self._evictions.append((table, id))
+
+    def after_commit(self, callback, *args):
+        self._callbacks.append((callback, args))
+
+    # ---------- TRANSACTION ----------
+    @contextlib.contextmanager
+    def savepoint(self):
+        """Everything inside is undone, statements and bookkeeping alike, if
+        the block raises; the exception still propagates."""
+        self.flush()
+        self._savepoints += 1
+        name = f'uow_{self._savepoints}'
+        mysql.dialect.savepoint(self.connection, self.cursor, name)
+        state = (self._counts.copy(), self._enrollment.copy(), set(self._tables),
+                 len(self._evictions), len(self._callbacks))
+        try:
+            yield self
+            self.flush()
+        except Exception:
+            self._pending = []
+            self.cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            counts, stats, tables, evictions, callbacks = state
+            self._counts, self._enrollment, self._tables = counts, stats, tables
+            del self._evictions[evictions:], self._callbacks[callbacks:]
+            raise
+        self.cursor.execute(f"RELEASE SAVEPOINT {name}")
+
+    def commit(self):
+        self.flush()
+        for table, delta in self._counts.items():
+            counters.adjust(self.cursor, table, delta)
+        enrollment.apply(self.cursor, self._enrollment)
+        if self._tables:
+            bump_versions(self.cursor, *sorted(self._tables))
+        self.connection.commit()
+
+        if self._tables:
+            reference_cache.invalidate(*self._tables)
+        for table, id in self._evictions:
+            identity.evict(table, id)
+        for callback, args in self._callbacks:
+            callback(*args)
+
+    def rollback(self):
+        self._pending = []
+        self.connection.rollback()
+        for table, id in self._evictions:
+            identity.evict(table, id)
+
+    def close(self):
+        self.cursor.close()
+
+
+@contextlib.contextmanager
+def unit_of_work():
+    """Yields the UnitOfWork of this app context, committing it when the
+    outermost block exits and rolling it back if that block raises. Nested
+    blocks join the enclosing unit, so model methods that use this can be
+    grouped into one transaction (and their deferred statements into shared
+    batches) by their caller; wrap a step in uow.savepoint() to be able to
+    carry on after it fails."""
+    unit = g.get('_unit_of_work')
+    if unit is not None:
+        yield unit
+        return
+
+    unit = g._unit_of_work = UnitOfWork(mysql.connection)
+    try:
+        yield unit
+        unit.commit()
+    except Exception:
+        unit.rollback()
+        raise
+    finally:
+        g.pop('_unit_of_work', None)
+        unit.close()
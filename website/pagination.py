@@ -0,0 +1,45 @@
+import base64
+import json
+
+
+def encode_cursor(*values):
+    # Opaque token for keyset pagination, e.g. encode_cursor(last_id)
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    # Returns the list of key values, or None for a missing/garbled token
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or not values:
+        return None
+    return values
+
+
+def cursor_int(token):
+    values = decode_cursor(token)
+    if values is None or not isinstance(values[0], int):
+        return None
+    return values[0]
+
+
+def keyset_window(rows, per_page, after=None, before=None, key='id'):
+    # Models fetch per_page + 1 rows so we can tell whether another page exists.
+    # "before" pages are fetched in reverse order and flipped back here.
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before is not None:
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    prev_cursor = encode_cursor(rows[0][key]) if rows and has_prev else None
+    next_cursor = encode_cursor(rows[-1][key]) if rows and has_next else None
+    return rows, prev_cursor, next_cursor
@@ -1,20 +1,39 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from ..models.collegedb import College
+from ..db.errors import DuplicateKeyError
+from ..pagination import cursor_int, encode_cursor, keyset_window
+from ..http_cache import response_cache
 
 college = Blueprint('college', __name__)
 college_model = College()
 
 @college.route('/')
+@response_cache.cached('college')
 def college_home():
-    page = request.args.get('page', 1, type=int)
     per_page = 10
+    after = cursor_int(request.args.get('after'))
+    before = cursor_int(request.args.get('before'))
+
+    if after is not None or before is not None:
+        rows = College.get_colleges_keyset(per_page + 1, after=after, before=before)
+        colleges, prev_cursor, next_cursor = keyset_window(rows, per_page, after=after, before=before)
+        return render_template("page-college.html", colleges=colleges, page=None, total_pages=None,
+                               prev_cursor=prev_cursor, next_cursor=next_cursor)
 
+    page = request.args.get('page', 1, type=int)
     total_colleges = College.count_colleges()
     total_pages = max(1, (total_colleges + per_page - 1) // per_page)
     offset = (page - 1) * per_page
 
     colleges = college_model.get_colleges_paginated(offset, per_page)
-    return render_template("page-college.html", colleges=colleges, page=page, total_pages=total_pages)
+
+    prev_cursor = next_cursor = None
+    if total_colleges > current_app.config['KEYSET_PAGINATION_THRESHOLD'] and colleges:
+        prev_cursor = encode_cursor(colleges[0]['id']) if page > 1 else None
+        next_cursor = encode_cursor(colleges[-1]['id']) if page < total_pages else None
+
+    return render_template("page-college.html", colleges=colleges, page=page, total_pages=total_pages,
+                           prev_cursor=prev_cursor, next_cursor=next_cursor)
 
 @college.route('/add', methods=['GET', 'POST'])
 def add_college():
@@ -24,18 +43,20 @@ def add_college():
 
         if not college_name or not college_code:
             flash('Name and code cannot be empty.', category='error')
-        elif not College.is_college_unique(college_name, college_code):
-            flash('College with the same name or code already exists.', category='error')
         else:
-            College(college_name=college_name, college_code=college_code).insert()
-            flash('College added.', category='success')
-            return redirect(url_for('college.college_home'))
+            try:
+                College(college_name=college_name, college_code=college_code).insert()
+            except DuplicateKeyError:
+                flash('College with the same name or code already exists.', category='error')
+            else:
+                flash('College added.', category='success')
+                return redirect(url_for('college.college_home'))
 
     return render_template('add-college.html')
 
 @college.route('/edit/<int:id>', methods=['GET', 'POST'])
 def edit_college(id):
-    original_college = next((c for c in College.get_colleges() if c['id'] == id), None)
+    original_college = College.get_by_id(id)
     if not original_college:
         flash('College not found.', category='error')
         return redirect(url_for('college.college_home'))
@@ -46,12 +67,14 @@ def edit_college(id):
 
         if not college_name or not college_code:
             flash('Name and code cannot be empty.', category='error')
-        elif not College.is_college_unique(college_name, college_code, current_college_id=id):
-            flash('College with the same name or code already exists.', category='error')
         else:
-            College(id=id, college_name=college_name, college_code=college_code).update()
-            flash('College updated.', category='success')
-            return redirect(url_for('college.college_home'))
+            try:
+                College(id=id, college_name=college_name, college_code=college_code).update()
+            except DuplicateKeyError:
+                flash('College with the same name or code already exists.', category='error')
+            else:
+                flash('College updated.', category='success')
+                return redirect(url_for('college.college_home'))
 
     return render_template("edit-college.html", college=original_college)
 
@@ -62,20 +85,17 @@ def delete_college(id):
     return redirect(url_for('college.college_home'))
 
 @college.route('/search', methods=['GET'])
+@response_cache.cached('college')
 def search_colleges():
     query = request.args.get('query', '').strip()
     if not query:
         return redirect(url_for('college.college_home'))
 
-    colleges = college_model.search_colleges(query)
+    colleges = College.search_colleges_ranked(query)
 
     if not colleges:
         flash('No results found.', category='info')
 
-    # Optional: ensure college_name exists for template (if used in template)
-    for c in colleges:
-        c['college_name'] = c.get('college_name') or ''
-
     # Provide page variables for template
     page = 1
     total_pages = 1
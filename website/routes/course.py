@@ -1,20 +1,39 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from ..models.coursedb import Course
+from ..db.errors import DuplicateKeyError
+from ..pagination import cursor_int, encode_cursor, keyset_window
+from ..http_cache import response_cache
 
 course = Blueprint('course', __name__)
 course_model = Course()
 
 @course.route('/')
+@response_cache.cached('course', 'college')
 def course_home():
-    page = request.args.get('page', 1, type=int)
     per_page = 10
+    after = cursor_int(request.args.get('after'))
+    before = cursor_int(request.args.get('before'))
+
+    if after is not None or before is not None:
+        rows = Course.get_courses_with_college_keyset(per_page + 1, after=after, before=before)
+        courses, prev_cursor, next_cursor = keyset_window(rows, per_page, after=after, before=before)
+        return render_template("page-course.html", courses=courses, page=None, total_pages=None,
+                               prev_cursor=prev_cursor, next_cursor=next_cursor)
 
+    page = request.args.get('page', 1, type=int)
     total_courses = Course.count_courses()
     total_pages = max(1, (total_courses + per_page - 1) // per_page)
     offset = (page - 1) * per_page
 
     courses = course_model.get_courses_with_college_paginated(offset, per_page)
-    return render_template("page-course.html", courses=courses, page=page, total_pages=total_pages)
+
+    prev_cursor = next_cursor = None
+    if total_courses > current_app.config['KEYSET_PAGINATION_THRESHOLD'] and courses:
+        prev_cursor = encode_cursor(courses[0]['id']) if page > 1 else None
+        next_cursor = encode_cursor(courses[-1]['id']) if page < total_pages else None
+
+    return render_template("page-course.html", courses=courses, page=page, total_pages=total_pages,
+                           prev_cursor=prev_cursor, next_cursor=next_cursor)
 
 @course.route('/add', methods=['GET', 'POST'])
 def add_course():
@@ -27,18 +46,20 @@ def add_course():
 
         if not course_name or not course_code or not college_id:
             flash('All fields are required.', category='error')
-        elif not Course.is_course_unique(course_name, course_code, college_id):
-            flash('Course with the same name or code already exists for this college.', category='error')
         else:
-            Course(course_name=course_name, course_code=course_code, college_id=college_id).insert()
-            flash('Course added.', category='success')
-            return redirect(url_for('course.course_home'))
+            try:
+                Course(course_name=course_name, course_code=course_code, college_id=college_id).insert()
+            except DuplicateKeyError:
+                flash('Course with the same name or code already exists.', category='error')
+            else:
+                flash('Course added.', category='success')
+                return redirect(url_for('course.course_home'))
 
     return render_template("add-course.html", colleges=colleges)
 
 @course.route('/edit/<int:id>', methods=['GET', 'POST'])
 def edit_course(id):
-    original_course = next((c for c in Course.get_courses_with_college() if c['id'] == id), None)
+    original_course = Course.get_by_id(id)
     if not original_course:
         flash('Course not found.', category='error')
         return redirect(url_for('course.course_home'))
@@ -52,12 +73,14 @@ def edit_course(id):
 
         if not course_name or not course_code or not college_id:
             flash('All fields are required.', category='error')
-        elif not Course.is_course_unique(course_name, course_code, college_id):
-            flash('Course with the same name or code already exists for this college.', category='error')
         else:
-            Course(id=id, course_name=course_name, course_code=course_code, college_id=college_id).update()
-            flash('Course updated.', category='success')
-            return redirect(url_for('course.course_home'))
+            try:
+                Course(id=id, course_name=course_name, course_code=course_code, college_id=college_id).update()
+            except DuplicateKeyError:
+                flash('Course with the same name or code already exists.', category='error')
+            else:
+                flash('Course updated.', category='success')
+                return redirect(url_for('course.course_home'))
 
     return render_template("edit-course.html", course=original_course, colleges=colleges)
 
@@ -68,20 +91,17 @@ def delete_course(id):
     return redirect(url_for('course.course_home'))
 
 @course.route('/search', methods=['GET'])
+@response_cache.cached('course', 'college')
 def search_course():
     query = request.args.get('query', '').strip()
     if not query:
         return redirect(url_for('course.course_home'))
 
-    courses = Course.search_courses_with_college(query)
+    courses = Course.search_courses_ranked(query)
 
     if not courses:
         flash('No results found.', category='info')
 
-    # Ensure college_name exists for template
-    for c in courses:
-        c['college_name'] = c.get('college_name') or ''
-
     # Define page variables for template
     page = 1
     total_pages = 1
@@ -1,7 +1,26 @@
-from flask import Blueprint, render_template, flash
+from flask import Blueprint, render_template, flash, jsonify, Response
+from ..db import mysql
+from ..models import enrollment
+from ..metrics import registry
 
 home = Blueprint('home', __name__)
 
 @home.route('/')
 def home_page():
-    return render_template("homepage.html")
\ No newline at end of file
+    return render_template("homepage.html")
+
+@home.route('/dashboard')
+def dashboard():
+    return render_template("dashboard.html", stats=enrollment.summary())
+
+@home.route('/api/dashboard')
+def dashboard_api():
+    return jsonify(enrollment.summary())
+
+@home.route('/status/db-pool')
+def db_pool_status():
+    return jsonify(mysql.pool_stats())
+
+@home.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
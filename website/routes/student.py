@@ -1,7 +1,14 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
+from flask import (Blueprint, render_template, request, flash, redirect, url_for, current_app,
+                   Response, abort, jsonify, stream_with_context)
 from ..models.studentdb import Student
-import cloudinary
-import cloudinary.uploader
+from ..db.errors import DuplicateKeyError
+from ..importer import StudentImporter, iter_rows
+from ..exporter import export_roster
+from ..pagination import cursor_int, encode_cursor, keyset_window
+from ..uploads import photo_uploader, PHOTO_PENDING
+from ..imaging import validate_photo
+from ..http_cache import response_cache
+from ..suggest import suggest_index
 
 MAX_FILE_SIZE = 1 * 1024 * 1024  # 1MB
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png'}
@@ -13,41 +20,112 @@ student = Blueprint('student', __name__)
 student_model = Student()
 
 
+def list_filters(args):
+    # Facet filters from the query string; anything malformed is ignored
+    filters = {}
+    for facet in ('college', 'course', 'year'):
+        value = args.get(facet, type=int)
+        if value is not None:
+            filters[facet] = str(value)
+    if args.get('gender') in ('Male', 'Female'):
+        filters['gender'] = args['gender']
+    return filters
+
+
 @student.route('/')
+@response_cache.cached('student', 'course', 'college')
 def student_home():
-    page = request.args.get('page', 1, type=int)
     per_page = 10
-    total_students = student_model.count_students()
+    filters = list_filters(request.args)
+    sort = request.args.get('sort')
+    if sort not in Student.SORTS:
+        sort = Student.DEFAULT_SORT
+    facets = Student.facet_counts(filters)
+    # Carried over by the pager and the column headers
+    list_args = dict(filters, sort=sort) if sort != Student.DEFAULT_SORT else dict(filters)
+
+    if filters or sort != Student.DEFAULT_SORT:
+        # Filtered or re-sorted: page numbers, with the total taken from the facet counts
+        page = max(1, request.args.get('page', 1, type=int))
+        total_pages = max(1, (facets['total'] + per_page - 1) // per_page)
+        students = Student.get_students_filtered(filters, sort, (page - 1) * per_page, per_page)
+        return render_template("page-student.html", students=students, page=page, total_pages=total_pages,
+                               courses=Student.get_courses(), facets=facets, filters=filters, sort=sort,
+                               list_args=list_args)
+
+    after = cursor_int(request.args.get('after'))
+    before = cursor_int(request.args.get('before'))
+
+    if after is not None or before is not None:
+        # Cursor mode: seek by id, no COUNT(*) and no OFFSET scan
+        rows = Student.get_students_with_courses_keyset(per_page + 1, after=after, before=before)
+        students, prev_cursor, next_cursor = keyset_window(rows, per_page, after=after, before=before)
+        return render_template("page-student.html", students=students, page=None, total_pages=None,
+                               prev_cursor=prev_cursor, next_cursor=next_cursor, courses=Student.get_courses(),
+                               facets=facets, filters=filters, sort=sort, list_args=list_args)
+
+    page = max(1, request.args.get('page', 1, type=int))
+    total_students = facets['total']  # the row counter, read by facet_counts
     total_pages = max(1, (total_students + per_page - 1) // per_page)
     offset = (page - 1) * per_page
     students = student_model.get_students_with_courses(limit=per_page, offset=offset)
 
-    # Ensure each student has a college name for display
-    for s in students:
-        s['college_name'] = s.get('college_name') or ''
+    prev_cursor = next_cursor = None
+    if total_students > current_app.config['KEYSET_PAGINATION_THRESHOLD'] and students:
+        # Large table: switch the prev/next links over to cursors
+        prev_cursor = encode_cursor(students[0]['id']) if page > 1 else None
+        next_cursor = encode_cursor(students[-1]['id']) if page < total_pages else None
+
+    return render_template("page-student.html", students=students, page=page, total_pages=total_pages,
+                           prev_cursor=prev_cursor, next_cursor=next_cursor, courses=Student.get_courses(),
+                           facets=facets, filters=filters, sort=sort, list_args=list_args)
+
+
+@student.route('/suggest')
+def suggest_students():
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 20)
+    if not query.strip():
+        return jsonify(results=[])
 
-    return render_template("page-student.html", students=students, page=page, total_pages=total_pages)
+    ids = suggest_index.lookup(query, limit)
+    if ids is None:
+        ids = Student.suggest_ids(query, limit)
+    rows = Student.get_many_by_ids(ids)
+    courses = {c['id']: c['course_code'] for c in Student.get_courses()}
+    results = [{'id': row['id'], 'student_id': row['student_id'], 'first_name': row['first_name'],
+                'last_name': row['last_name'], 'course_code': courses.get(row['course_id'])}
+               for row in (rows.get(id) for id in ids) if row is not None]
+    return jsonify(results=results)
 
 
 @student.route('/search')
+@response_cache.cached('student', 'course', 'college')
 def search_student():
     query = request.args.get('query', '').strip()
-    page = request.args.get('page', 1, type=int)
+    page = max(1, request.args.get('page', 1, type=int))
     per_page = 10
 
     if not query:
         return redirect(url_for('student.student_home'))
 
-    all_results = Student.search_students(query)
-    total_students = len(all_results)
+    count_limit = current_app.config['SEARCH_EXACT_COUNT_LIMIT']
+    total_students = Student.count_students_ranked(query, limit=count_limit)
+    approximate = total_students > count_limit
     total_pages = max(1, (total_students + per_page - 1) // per_page)
     offset = (page - 1) * per_page
-    students = all_results[offset:offset + per_page]
-
-    for s in students:
-        s['college_name'] = s.get('college_name') or ''
+    students = Student.search_students_ranked(query, offset, per_page)
+    if approximate:
+        # Only "at least" is known past the limit: keep Next open while pages come back full
+        if len(students) < per_page:
+            approximate = False
+            total_pages = page
+        else:
+            total_pages = max(total_pages, page + 1)
 
-    return render_template("page-student.html", students=students, page=page, total_pages=total_pages)
+    return render_template("page-student.html", students=students, page=page, total_pages=total_pages,
+                           query=query, approximate=approximate, total_students=total_students,
+                           courses=Student.get_courses())
 
 
 @student.route('/add', methods=['GET', 'POST'])
@@ -72,11 +150,9 @@ def add_student():
 
         if not student_id or not first_name or not last_name or not gender or not year or not course_id:
             flash('All fields are required.', category='error')
-        elif not Student.is_student_unique(student_id, first_name, last_name, gender, year, course_id, college_id):
-            flash('Student with the same ID already exists.', category='error')
         else:
             try:
-                cloudinary_url = ''
+                photo = None
                 uploaded_file = request.files.get('student_photo')
                 if uploaded_file and uploaded_file.filename != '':
                     if allowed_file(uploaded_file.filename):
@@ -86,21 +162,29 @@ def add_student():
                         if file_size > MAX_FILE_SIZE:
                             flash('File exceeds 1MB limit.', category='error')
                             return redirect(url_for('student.add_student'))
-
-                        response = cloudinary.uploader.upload(
-                            uploaded_file,
-                            folder=current_app.config['CLOUDY_FOLDER']
-                        )
-                        cloudinary_url = response.get('secure_url', '')
+                        photo = uploaded_file.read()
+                        try:
+                            validate_photo(photo)
+                        except ValueError as e:
+                            flash(str(e), category='error')
+                            return redirect(url_for('student.add_student'))
                     else:
                         flash('Invalid file type. Allowed: jpg, jpeg, png.', category='error')
                         return redirect(url_for('student.add_student'))
 
-                Student(student_id=student_id, first_name=first_name, last_name=last_name,
-                        gender=gender, year=year, course_id=course_id, college_id=college_id,
-                        cloudinary_url=cloudinary_url).insert()
+                # Save right away; the photo upload finishes in the background
+                token = photo_uploader.new_token() if photo else None
+                new_student = Student(student_id=student_id, first_name=first_name, last_name=last_name,
+                                      gender=gender, year=year, course_id=course_id, college_id=college_id,
+                                      cloudinary_url='', photo_status=PHOTO_PENDING if photo else None,
+                                      photo_token=token)
+                new_student.insert()
+                if photo:
+                    photo_uploader.submit(new_student.id, photo, uploaded_file.filename, token)
                 flash('Student added.', category='success')
                 return redirect(url_for('student.student_home'))
+            except DuplicateKeyError:
+                flash('Student with the same ID already exists.', category='error')
             except Exception as e:
                 print(f"Error adding student: {e}")
                 flash('Error adding student.', category='error')
@@ -133,11 +217,9 @@ def edit_student(id):
 
         if not student_id or not first_name or not last_name or not gender or not year or not course_id:
             flash('All fields are required.', category='error')
-        elif not Student.is_student_unique(student_id, first_name, last_name, gender, year, course_id, college_id, current_student_id=id):
-            flash('Student with the same ID already exists.', category='error')
         else:
             try:
-                cloudinary_url = student['cloudinary_url']
+                photo = None
                 uploaded_file = request.files.get('student_photo')
                 if uploaded_file and uploaded_file.filename != '':
                     if allowed_file(uploaded_file.filename):
@@ -147,21 +229,26 @@ def edit_student(id):
                         if file_size > MAX_FILE_SIZE:
                             flash('File exceeds 1MB limit.', category='error')
                             return redirect(url_for('student.edit_student', id=id))
-
-                        response = cloudinary.uploader.upload(
-                            uploaded_file,
-                            folder=current_app.config['CLOUDY_FOLDER']
-                        )
-                        cloudinary_url = response.get('secure_url', '')
+                        photo = uploaded_file.read()
+                        try:
+                            validate_photo(photo)
+                        except ValueError as e:
+                            flash(str(e), category='error')
+                            return redirect(url_for('student.edit_student', id=id))
                     else:
                         flash('Invalid file type. Allowed: jpg, jpeg, png.', category='error')
                         return redirect(url_for('student.edit_student', id=id))
 
+                token = photo_uploader.new_token() if photo else None
                 Student(id=id, student_id=student_id, first_name=first_name, last_name=last_name,
                         gender=gender, year=year, course_id=course_id, college_id=college_id,
-                        cloudinary_url=cloudinary_url).update()
+                        photo_status=PHOTO_PENDING if photo else None, photo_token=token).update()
+                if photo:
+                    photo_uploader.submit(id, photo, uploaded_file.filename, token)
                 flash('Student updated.', category='success')
                 return redirect(url_for('student.student_home'))
+            except DuplicateKeyError:
+                flash('Student with the same ID already exists.', category='error')
             except Exception as e:
                 print(f"Error updating student: {e}")
                 flash('Error updating student.', category='error')
@@ -174,3 +261,86 @@ def delete_student(id):
     Student(id=id).delete()
     flash('Student deleted.', category='success')
     return redirect(url_for('student.student_home'))
+
+
+BULK_ACTIONS = {'delete', 'set_course', 'promote'}
+
+
+@student.route('/bulk', methods=['POST'])
+def bulk_students():
+    action = request.form.get('action')
+    query = request.form.get('query', '').strip()
+    ids = request.form.getlist('ids', type=int)
+    # "All matching" applies the action to every search result, not just this page
+    all_matching = request.form.get('all_matching') == '1' and query
+    back = url_for('student.search_student', query=query) if query else url_for('student.student_home')
+
+    if action not in BULK_ACTIONS:
+        flash('Choose an action.', category='error')
+        return redirect(back)
+    if not all_matching and not ids:
+        flash('Select at least one student.', category='error')
+        return redirect(back)
+
+    target = {'query': query} if all_matching else {'ids': ids}
+    chunk_size = current_app.config['BULK_CHUNK_SIZE']
+    try:
+        if action == 'delete':
+            count = Student.delete_many(chunk_size=chunk_size, **target)
+            flash(f'{count} students deleted.', category='success')
+        elif action == 'set_course':
+            count = Student.set_course(request.form.get('course_id', type=int) or 0, chunk_size=chunk_size, **target)
+            flash(f'{count} students moved to the selected course.', category='success')
+        else:
+            count = Student.promote(chunk_size=chunk_size, **target)
+            flash(f'{count} students moved up a year.', category='success')
+    except ValueError as e:
+        flash(str(e), category='error')
+    except Exception as e:
+        print(f"Error in bulk {action}: {e}")
+        flash('Error updating students. Chunks already committed were kept.', category='error')
+    return redirect(back)
+
+
+@student.route('/import', methods=['GET', 'POST'])
+def import_students():
+    report = None
+    if request.method == 'POST':
+        uploaded_file = request.files.get('import_file')
+        if not uploaded_file or uploaded_file.filename == '':
+            flash('Choose a CSV or XLSX file to import.', category='error')
+        else:
+            try:
+                rows = iter_rows(uploaded_file.stream, uploaded_file.filename)
+                report = StudentImporter().run(rows)
+                flash(f'{report.inserted} students imported, {report.skipped} skipped.', category='success')
+            except ValueError as e:
+                flash(str(e), category='error')
+            except Exception as e:
+                print(f"Error importing students: {e}")
+                flash('Error importing students.', category='error')
+
+    return render_template("import-student.html", report=report)
+
+
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+@student.route('/export.<fmt>')
+def export_students(fmt):
+    if fmt not in EXPORT_MIMETYPES:
+        abort(404)
+    compress = request.args.get('gzip', 0, type=int) == 1
+
+    filename = f'students.{fmt}'
+    mimetype = EXPORT_MIMETYPES[fmt]
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    # stream_with_context keeps the request (and its DB connection) open while the body is generated
+    body = stream_with_context(export_roster(fmt, compress=compress))
+    return Response(body, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,49 @@
+import re
+import shlex
+
+# Field-scoped terms understood by the student search box, e.g. "year:3 college:CCS"
+FIELDS = {'id', 'first', 'last', 'name', 'gender', 'year', 'course', 'college'}
+
+# InnoDB does not index tokens shorter than innodb_ft_min_token_size (3 by default)
+FT_MIN_TOKEN_SIZE = 3
+
+# Columns of each table's FULLTEXT index, in index order (see migration 0003)
+FULLTEXT_COLUMNS = {
+    'student': ('student_id', 'first_name', 'last_name', 'gender'),
+    'course': ('course_code', 'course_name'),
+    'college': ('college_name', 'college_code'),
+}
+
+_WORD_SPLIT = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def parse_query(query):
+    # Split a raw query into free-text terms and a {field: value} dict
+    try:
+        tokens = shlex.split(query)
+    except ValueError:
+        tokens = query.split()
+
+    terms, filters = [], {}
+    for token in tokens:
+        field, sep, value = token.partition(':')
+        field = field.lower()
+        if sep and field in FIELDS and value:
+            filters[field] = value
+        elif token:
+            terms.append(token)
+    return terms, filters
+
+
+def fulltext_term(term):
+    # Boolean-mode prefix expression for one term ("dela-cruz" -> "+dela* +cruz*"),
+    # or None when a word is too short for the index and LIKE has to be used instead
+    words = [w for w in _WORD_SPLIT.split(term) if w]
+    if not words or any(len(w) < FT_MIN_TOKEN_SIZE for w in words):
+        return None
+    return ' '.join(f'+{w}*' for w in words)
+
+
+def like_prefix(value):
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%"
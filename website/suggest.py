@@ -0,0 +1,277 @@
+import array
+import bisect
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+
+from website.cache import reference_cache
+from website.db import mysql
+
+_SEPARATORS = re.compile(r'[\s,]+')
+
+
+def normalize(text):
+    # Case-insensitive like the MySQL collation; "Dela Cruz,  Juan" -> "dela cruz juan"
+    return _SEPARATORS.sub(' ', (text or '').lower()).strip()
+
+
+def index_keys(student_id, first_name, last_name):
+    # "first last" and "last first" also cover plain first- and last-name prefixes
+    first, last = normalize(first_name), normalize(last_name)
+    keys = {normalize(student_id), f'{first} {last}'.strip(), f'{last} {first}'.strip()}
+    return [key.encode() for key in keys if key]
+
+
+class SortedKeys:
+    """Immutable sorted (key, id) pairs packed into one bytes blob plus two
+    arrays of offsets and ids: about 4 + 4 + len(key) bytes per entry instead
+    of ~150 for a list of tuples."""
+
+    def __init__(self, blob=b'', offsets=None, ids=None):
+        self.blob = blob
+        self.offsets = offsets if offsets is not None else array.array('I', [0])
+        self.ids = ids if ids is not None else array.array('I')
+
+    @classmethod
+    def build(cls, keys, ids):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        offsets = array.array('I', [0])
+        position = 0
+        for i in order:
+            position += len(keys[i])
+            offsets.append(position)
+        return cls(b''.join(keys[i] for i in order), offsets, array.array('I', (ids[i] for i in order)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def key(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def scan(self, prefix):
+        # (key, id) pairs starting with `prefix`, in key order
+        lo, hi = 0, len(self.ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        for i in range(lo, len(self.ids)):
+            key = self.key(i)
+            if not key.startswith(prefix):
+                break
+            yield key, self.ids[i]
+
+    def nbytes(self):
+        return (sys.getsizeof(self.blob) + self.offsets.itemsize * len(self.offsets)
+                + self.ids.itemsize * len(self.ids))
+
+
+class SuggestIndex:
+    """Per-process prefix index over student_id and the two name orders, for
+    the /student/suggest typeahead.
+
+    The bulk of it is a SortedKeys built from one scan of the student table,
+    on a background thread at boot. Student writes in this process land in a
+    small sorted delta, and the base entries of changed students are skipped.
+    The base is rebuilt when the delta grows past a tenth of it, after bulk
+    writes, and at most every refresh interval once the student table version
+    shows a change (possibly made by another worker). While lookup() returns
+    None (see there) callers fall back to SQL.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.refresh_interval = 300
+        self.base = None
+        self.version = None
+        self.built_at = 0.0
+        self.build_seconds = 0.0
+        self._delta = []        # sorted (key, id)
+        self._delta_keys = {}   # id -> keys in _delta
+        self._stale = set()     # ids whose base entries are out of date
+        self._replay = None     # writes seen while a rebuild scans the table
+        self._dirty = False
+        self._invalidated = 0   # bulk writes seen / included in the base
+        self._rebuilt = 0
+        self._building_pid = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('SUGGEST_INDEX', self.enabled)
+        self.refresh_interval = app.config.get('SUGGEST_REFRESH_INTERVAL', self.refresh_interval)
+        if self.enabled:
+            self.rebuild_async()
+
+    # ---------- LOOKUP ----------
+    def lookup(self, query, limit=10):
+        """Up to `limit` student ids whose ID or name starts with `query`, in
+        key order. None until the first build, and after bulk writes until
+        the rebuild they trigger finishes."""
+        if not self.enabled:
+            return None
+        self._maybe_rebuild()
+        base = self.base
+        if base is None or self._rebuilt != self._invalidated:
+            return None
+        prefix = normalize(query).encode()
+        if not prefix:
+            return []
+
+        with self._lock:
+            # A student has at most three keys, so this many entries hold `limit` students
+            start = bisect.bisect_left(self._delta, (prefix,))
+            delta = []
+            for key, id in self._delta[start:start + 3 * limit]:
+                if not key.startswith(prefix):
+                    break
+                delta.append((key, id))
+        stale = self._stale
+        current = ((key, id) for key, id in base.scan(prefix) if id not in stale)
+
+        ids = []
+        for _, id in heapq.merge(current, delta):
+            if id not in ids:
+                ids.append(id)
+                if len(ids) == limit:
+                    break
+        return ids
+
+    # ---------- WRITES ----------
+    def add(self, id, student_id, first_name, last_name):
+        # Insert or update: the student's entries become exactly these
+        keys = index_keys(student_id, first_name, last_name)
+        with self._lock:
+            self._drop(id)
+            for key in keys:
+                bisect.insort(self._delta, (key, id))
+            self._delta_keys[id] = keys
+            if self._replay is not None:
+                self._replay.append((id, keys))
+
+    def remove(self, *ids):
+        with self._lock:
+            for id in ids:
+                self._drop(id)
+                if self._replay is not None:
+                    self._replay.append((id, []))
+
+    def invalidate(self):
+        # After bulk writes: cheaper to rebuild than to track each row. Lookups
+        # fall back to SQL until the rebuild has picked them up.
+        with self._lock:
+            self._invalidated += 1
+            self._dirty = True
+
+    def _drop(self, id):
+        for key in self._delta_keys.pop(id, ()):
+            index = bisect.bisect_left(self._delta, (key, id))
+            del self._delta[index]
+        self._stale.add(id)
+
+    # ---------- BUILDING ----------
+    def _maybe_rebuild(self):
+        if self._building_pid == os.getpid():
+            return
+        if self._building_pid is not None or self._dirty:
+            # A build thread that did not survive a fork, or bulk writes
+            self.rebuild_async()
+        elif self.base is not None and len(self._stale) > max(1000, len(self.base) // 10):
+            self.rebuild_async()
+        elif time.monotonic() - self.built_at > self.refresh_interval:
+            if self.base is None or reference_cache.version('student') != self.version:
+                self.rebuild_async()
+            else:
+                self.built_at = time.monotonic()
+
+    def _after_fork(self):
+        # The parent's build thread may have held the lock when the worker forked
+        self._lock = threading.Lock()
+
+    def rebuild_async(self):
+        with self._lock:
+            if self._building_pid == os.getpid():
+                return
+            self._building_pid = os.getpid()
+            self._dirty = False
+        thread = threading.Thread(target=self._rebuild_in_context, name='suggest-index', daemon=True)
+        thread.start()
+
+    def _rebuild_in_context(self):
+        try:
+            with self.app.app_context():
+                self.rebuild()
+        except Exception as e:
+            self.app.logger.error('Suggest index build failed: %s', e)
+            with self._lock:
+                self._building_pid = None
+                self._replay = None
+                self.built_at = time.monotonic()  # retry after the refresh interval
+
+    def rebuild(self):
+        """Scan the student table into a new base, then swap it in and replay
+        the writes that happened during the scan."""
+        started = time.perf_counter()
+        with self._lock:
+            self._building_pid = os.getpid()
+            self._replay = []
+            invalidated = self._invalidated
+        version = reference_cache.version('student')
+        keys, ids = [], array.array('I')
+        cur = mysql.connection.cursor(buffered=False)
+        try:
+            cur.execute("SELECT id, student_id, first_name, last_name FROM student")
+            while True:
+                rows = cur.fetchmany(10000)
+                if not rows:
+                    break
+                for id, student_id, first_name, last_name in rows:
+                    for key in index_keys(student_id, first_name, last_name):
+                        keys.append(key)
+                        ids.append(id)
+        finally:
+            cur.close()
+        base = SortedKeys.build(keys, ids)
+        del keys, ids
+
+        with self._lock:
+            replay = self._replay
+            self.base, self.version, self._rebuilt = base, version, invalidated
+            self._delta, self._delta_keys, self._stale = [], {}, set()
+            self._replay = None
+            for id, entry_keys in replay:
+                self._drop(id)
+                for key in entry_keys:
+                    bisect.insort(self._delta, (key, id))
+                if entry_keys:
+                    self._delta_keys[id] = entry_keys
+            self.built_at = time.monotonic()
+            self.build_seconds = time.perf_counter() - started
+            self._building_pid = None
+        self.app.logger.info('Suggest index: %d keys, %.1f MB, built in %.2fs',
+                             len(base), self.stats()['bytes'] / 1e6, self.build_seconds)
+
+    def stats(self):
+        base = self.base
+        with self._lock:
+            delta_bytes = (sys.getsizeof(self._delta) + sum(sys.getsizeof(key) + 64 for key, _ in self._delta)
+                           + sys.getsizeof(self._delta_keys) + sys.getsizeof(self._stale))
+            delta = len(self._delta)
+        return {
+            'ready': base is not None,
+            'keys': len(base) if base is not None else 0,
+            'delta_keys': delta,
+            'bytes': (base.nbytes() if base is not None else 0) + delta_bytes,
+            'build_seconds': self.build_seconds,
+        }
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,158 @@
+import io
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.uploader
+
+from website.imaging import process_photo
+
+PHOTO_NONE = 'none'
+PHOTO_PENDING = 'pending'
+PHOTO_READY = 'ready'
+PHOTO_FAILED = 'failed'
+
+
+# ---------- STORAGE BACKENDS ----------
+class CloudinaryStorage:
+    def __init__(self, folder=None):
+        self.folder = folder
+
+    def save(self, data, filename):
+        response = cloudinary.uploader.upload(io.BytesIO(data), folder=self.folder)
+        return response.get('secure_url', '')
+
+
+class LocalStorage:
+    """Writes photos under a directory served as static files. Used for tests,
+    benchmarks and single-node installs without a Cloudinary account."""
+
+    def __init__(self, directory, url_prefix):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip('/')
+
+    def save(self, data, filename):
+        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'bin'
+        name = f"{uuid.uuid4().hex}.{extension}"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(data)
+        return f"{self.url_prefix}/{name}"
+
+
+def make_storage(app):
+    backend = app.config.get('PHOTO_STORAGE', 'cloudinary')
+    if backend == 'local':
+        directory = app.config.get('PHOTO_LOCAL_DIR') or os.path.join(app.static_folder, 'uploads')
+        return LocalStorage(directory, app.config.get('PHOTO_LOCAL_URL', '/static/uploads'))
+    if backend == 'cloudinary':
+        return CloudinaryStorage(app.config.get('CLOUDY_FOLDER'))
+    raise ValueError(f'Unknown PHOTO_STORAGE backend {backend!r}')
+
+
+# ---------- UPLOAD QUEUE ----------
+class PhotoUploader:
+    """Moves photo uploads off the request path.
+
+    The route saves the student with photo_status='pending' and a fresh
+    new_token() as photo_token, then calls submit() with that token; a worker
+    thread normalizes the image, uploads the photo and its thumbnail with
+    retries and exponential backoff, then stores the URLs (or marks the photo
+    failed) in its own app context. The result is only stored while the
+    student's photo_token is still this submit's, so when two edits race the
+    older upload can't overwrite the newer one.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.storage = None
+        self.workers = 4
+        self.retries = 3
+        self.backoff = 1.0
+        self.run_async = True
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.storage = make_storage(app)
+        self.workers = app.config.get('PHOTO_UPLOAD_WORKERS', self.workers)
+        self.retries = app.config.get('PHOTO_UPLOAD_RETRIES', self.retries)
+        self.backoff = app.config.get('PHOTO_UPLOAD_BACKOFF', self.backoff)
+        self.run_async = app.config.get('PHOTO_UPLOAD_ASYNC', self.run_async)
+
+    @property
+    def executor(self):
+        # One pool per process; threads do not survive a gunicorn fork
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='photo-upload')
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    @staticmethod
+    def new_token():
+        return uuid.uuid4().hex
+
+    def submit(self, student_pk, data, filename, token=None):
+        if self.run_async:
+            return self.executor.submit(self._run, student_pk, data, filename, token)
+        return self._run(student_pk, data, filename, token)
+
+    def _run(self, student_pk, data, filename, token=None):
+        # Nobody reads the future: every failure has to end up in the log and
+        # in photo_status, or the photo would stay 'pending' forever
+        from website.models.studentdb import Student
+
+        try:
+            url = thumbnail_url = None
+            try:
+                processed = process_photo(data)
+            except ValueError as e:
+                self.app.logger.error('Photo for student %s could not be processed: %s', student_pk, e)
+            else:
+                url = self._upload_with_retries(processed.photo, f'photo.{processed.extension}')
+                if url is not None:
+                    thumbnail_url = self._upload_with_retries(processed.thumbnail,
+                                                              f'thumbnail.{processed.extension}')
+
+            with self.app.app_context():
+                if url is None:
+                    Student.set_photo(student_pk, None, PHOTO_FAILED, token=token)
+                else:
+                    Student.set_photo(student_pk, url, PHOTO_READY, thumbnail_url=thumbnail_url, token=token)
+            return url
+        except Exception:
+            self.app.logger.exception('Photo upload for student %s failed', student_pk)
+            try:
+                with self.app.app_context():
+                    Student.set_photo(student_pk, None, PHOTO_FAILED, token=token)
+            except Exception:
+                self.app.logger.exception('Could not mark the photo of student %s failed', student_pk)
+            return None
+
+    def _upload_with_retries(self, data, filename):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.storage.save(data, filename)
+            except Exception as e:
+                if attempt == self.retries:
+                    self.app.logger.error('Photo upload failed after %d attempts: %s', attempt + 1, e)
+                    return None
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                self.app.logger.warning('Photo upload failed (%s), retrying in %.1fs', e, delay)
+                time.sleep(delay)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+photo_uploader = PhotoUploader()